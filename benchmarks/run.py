@@ -0,0 +1,220 @@
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from src.epidemics_simulator.algorithms import HavelHakimi, HavelHakimiDual
+from src.epidemics_simulator.array_simulation import ArraySimulation
+from src.epidemics_simulator.gillespie_simulation import GillespieSimulation
+from src.epidemics_simulator.simulation import Simulation
+from src.epidemics_simulator.storage import Network
+from src.epidemics_simulator.visualization.networks.plotly_wrapper import PlotlyWrapper
+
+TEMPLATES_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "src", "epidemics_simulator", "gui", "templates.py"
+)
+ENGINES = {"simulation": Simulation, "array": ArraySimulation, "gillespie": GillespieSimulation}
+# lower is better for every metric
+METRICS = [
+    "build",
+    "havel_hakimi",
+    "havel_hakimi_dual",
+    "step_simulation",
+    "step_array",
+    "step_gillespie",
+    "coords",
+    "peak_memory",
+]
+
+
+# templates.py only needs the storage package, loading it by path avoids importing
+# the gui package and with it PyQt
+def load_templates():
+    spec = importlib.util.spec_from_file_location("templates", TEMPLATES_FILE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return {name: x for name, x in vars(module).items() if isinstance(x, Network)}
+
+
+# copy of the template with all groups and initial infections scaled to about size nodes
+def scale(template: Network, size: int) -> Network:
+    data = template.to_dict()
+    factor = size / sum(group["size"] for group in data["groups"])
+    for group in data["groups"]:
+        group["size"] = max(1, round(group["size"] * factor))
+        group["max_vaccination_amount"] = round(group["max_vaccination_amount"] * factor)
+    for disease in data["diseases"]:
+        disease["initial_infection_count"] = max(
+            1, round(disease["initial_infection_count"] * factor)
+        )
+    return Network.from_dict(data)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def time_steps(engine, network: Network, steps: int) -> float:
+    sim = engine(network)
+    sim.init_simulation()
+    start = time.perf_counter()
+    for _ in range(steps):
+        sim.simulate_step()
+    return (time.perf_counter() - start) / steps
+
+
+# runs the degree sequence algorithms alone with the parameters NetworkBuilder uses
+# for the first group and the first external connection
+def time_algorithms(network: Network) -> dict:
+    results = {}
+    group = network.active_groups[0]
+    h = HavelHakimi(
+        group.size,
+        min(max(0, group.avrg_int_con - group.delta_int_con), group.size),
+        min(group.avrg_int_con + group.delta_int_con, group.size),
+    )
+    results["havel_hakimi"], _ = timed(h.run)
+    for group in network.active_groups:
+        for target_id, avrg in group.avrg_ext_con.items():
+            target = network.get_group_by_id(target_id)
+            delta = group.delta_ext_con[target_id]
+            max_size = max(group.size, target.size)
+            h = HavelHakimiDual(
+                group.size,
+                target.size,
+                min(max(0, avrg - delta), max_size),
+                min(avrg + delta, max_size),
+            )
+            results["havel_hakimi_dual"], _ = timed(h.run)
+            return results
+    return results
+
+
+def peak_memory(network: Network) -> int:
+    gc.collect()
+    tracemalloc.start()
+    network.build()
+    ArraySimulation(network).init_simulation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def run_case(template: Network, size: int, steps: int, memory: bool) -> dict:
+    network = scale(template, size)
+    result = {"nodes": sum(group.size for group in network.groups)}
+    result.update(time_algorithms(network))
+    result["build"], _ = timed(network.build)
+    result["edges"] = int(network.compile().edge_count)
+    for name, engine in ENGINES.items():
+        result[f"step_{name}"] = time_steps(engine, network, steps)
+    result["coords"], (_, node_coord_index, x, y, z) = timed(
+        PlotlyWrapper.calculate_network_coords, network, 1
+    )
+    edge_time, _ = timed(
+        PlotlyWrapper.calculate_edge_coords, network, True, True, [], node_coord_index, x, y, z
+    )
+    result["coords"] += edge_time
+    if memory:
+        # separate pass, tracing slows down everything it measures
+        result["peak_memory"] = peak_memory(network)
+    return result
+
+
+def machine():
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+    }
+
+
+# prints new / baseline for every metric and returns the regressions
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    if baseline.get("machine") != results["machine"]:
+        print("Warning: the baseline was recorded on a different machine")
+    regressions = []
+    for case, values in results["cases"].items():
+        old = baseline.get("cases", {}).get(case)
+        if not old or "skipped" in values or "skipped" in old:
+            continue
+        print(case)
+        for metric in METRICS:
+            if metric not in values or not old.get(metric):
+                continue
+            ratio = values[metric] / old[metric]
+            regressed = ratio > 1 + tolerance
+            print(
+                f"  {metric:<20}{old[metric]:>14.6g}{values[metric]:>14.6g}{ratio:>8.2f}x", end=""
+            )
+            print("  REGRESSION" if regressed else "")
+            if regressed:
+                regressions.append((case, metric, ratio))
+    return regressions
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Times building, stepping and the visualization of scaled template networks.",
+    )
+    parser.add_argument(
+        "--templates",
+        nargs="+",
+        default=["oscillating", "r0s1", "r0g1"],
+        help="names of the networks in gui/templates.py",
+    )
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--steps", type=int, default=20, help="steps timed per engine")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=600,
+        help="skip bigger sizes of a template once its build took longer than this many seconds",
+    )
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory pass")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="JSON file to write")
+    parser.add_argument("--baseline", help="JSON file of an earlier run to compare with")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1, help="allowed slowdown before a regression"
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parse_args(args)
+    templates = load_templates()
+    results = {"date": str(datetime.now()), "machine": machine(), "steps": args.steps, "cases": {}}
+    for name in args.templates:
+        over_budget = False
+        for size in sorted(args.sizes):
+            case = f"{name}@{size}"
+            if over_budget:
+                results["cases"][case] = {"skipped": "a smaller size exceeded the budget"}
+                continue
+            print(f"Running {case}", flush=True)
+            results["cases"][case] = run_case(templates[name], size, args.steps, not args.no_memory)
+            over_budget = results["cases"][case]["build"] > args.budget
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"Saved results in {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+from src.epidemics_simulator.array_simulation import ArraySimulation
+from src.epidemics_simulator.ensemble import run_ensemble
+from src.epidemics_simulator.gillespie_simulation import GillespieSimulation
+from src.epidemics_simulator.storage import Project, SimStats
+
+ENGINES = {"array": ArraySimulation, "gillespie": GillespieSimulation}
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.epidemics_simulator",
+        description="Simulates a project without the GUI and saves the stats in its stats folder.",
+    )
+    parser.add_argument("project", help="project folder containing network.json")
+    parser.add_argument("-s", "--steps", type=int, default=100, help="steps per replicate")
+    parser.add_argument("-r", "--replicates", type=int, default=1, help="number of replicates")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="worker processes for building and the replicates",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="seed of the ensemble")
+    parser.add_argument("--engine", choices=ENGINES, default="array")
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="build the network even if the project contains connections for its parameters",
+    )
+    parser.add_argument("--name", help="name of the stat files, defaults to the current time")
+    parser.add_argument(
+        "--mean-only",
+        action="store_true",
+        help="only save the mean of all replicates instead of every replicate",
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parse_args(args)
+    if not os.path.exists(os.path.join(args.project, Project.NETWORK_FILE_NAME)):
+        sys.exit(f"No network was found in {args.project}")
+    project = Project.load_from_file(args.project)
+    if not project or not project.network:
+        sys.exit(f"{args.project} does not contain a valid network")
+    os.makedirs(project.stat_file_location, exist_ok=True)
+
+    name = args.name or str(datetime.now()).replace(" ", "T").split(".")[0].replace(":", "_")
+    valid, msg = SimStats.is_valid_file_name(name)
+    if not valid:
+        sys.exit(msg)
+
+    start = time.perf_counter()
+    if args.rebuild:
+        project.network.build(args.workers, args.seed)
+        built = True
+    else:
+        built = project.network.ensure_built(args.workers, args.seed)
+    build_time = time.perf_counter() - start
+    size = project.network.compile().size
+    if built:
+        # the next run loads the connections from graph.npz instead of building again
+        project.save_graph()
+        print(f"Built {project.network.name} with {size} nodes in {build_time:.2f}s")
+    else:
+        print(f"Using the saved connections of {project.network.name} with {size} nodes")
+
+    start = time.perf_counter()
+    result = run_ensemble(
+        project.network,
+        args.replicates,
+        args.steps,
+        workers=args.workers,
+        seed=args.seed,
+        engine=ENGINES[args.engine],
+    )
+    elapsed = time.perf_counter() - start
+
+    if args.replicates > 1:
+        result.mean_stats().to_csv(project.stat_file_location, f"{name}_mean")
+    if not args.mean_only or args.replicates == 1:
+        for i, stats in enumerate(result.stats):
+            stats.to_csv(
+                project.stat_file_location, name if args.replicates == 1 else f"{name}_{i}"
+            )
+    print(f"Saved stats as {name} in {project.stat_file_location}")
+
+    steps = args.steps * args.replicates
+    print(
+        f"Simulated {args.replicates} x {args.steps} steps in {elapsed:.2f}s: "
+        f"{steps / elapsed:.1f} steps/sec, {steps * size / elapsed:.0f} node-updates/sec"
+    )
+
+
+if __name__ == "__main__":
+    main()
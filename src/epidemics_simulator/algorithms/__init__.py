@@ -1,3 +1,7 @@
 from .havel_hakimi import HavelHakimi
 from .havel_hakimi_dual import HavelHakimiDual
 from .circle_grid import CircleGrid
+from .degree_buckets import DegreeBuckets
+from .erdos_gallai import ErdosGallai
+from .configuration_model import ConfigurationModel, ConfigurationModelDual
+from .stochastic_block_model import StochasticBlockModel
@@ -0,0 +1,70 @@
+import numpy as np
+
+from .havel_hakimi_dual import HavelHakimiDual
+
+
+# https://en.wikipedia.org/wiki/Configuration_model
+# Alternative to HavelHakimi for very large groups. Every node gets a random degree between
+# min_deg and max_deg and as many stubs, the shuffled stubs are paired up. Self loops and
+# duplicate edges are removed afterwards (erased configuration model), so a few nodes end up
+# with a lower degree than drawn. Everything is vectorized and the edges are returned as
+# two arrays of node ids, sources[i] < targets[i]. Random numbers are drawn from rng.
+class ConfigurationModel:
+    def __init__(
+        self, size: int, min_deg: int, max_deg: int, rng: np.random.Generator = None
+    ) -> None:
+        self.rng = rng or np.random.default_rng()
+        self.size = size
+        self.min_deg = min_deg
+        self.max_deg = max_deg
+        self.deg_seq = np.zeros(0, dtype=np.int64)
+        self.sources = np.zeros(0, dtype=np.int64)
+        self.targets = np.zeros(0, dtype=np.int64)
+
+    def run(self):
+        self.deg_seq = self.rng.integers(self.min_deg, self.max_deg + 1, size=self.size)
+        if self.deg_seq.sum() % 2 != 0:
+            # one stub would be left without a partner
+            self.deg_seq[self.rng.choice(np.flatnonzero(self.deg_seq))] -= 1
+        stubs = np.repeat(np.arange(self.size), self.deg_seq)
+        self.rng.shuffle(stubs)
+        pairs = np.sort(stubs.reshape(-1, 2), axis=1)
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+        self.sources, self.targets = ConfigurationModel.unique_edges(pairs, self.size)
+        return self.sources, self.targets
+
+    # removes duplicate rows of an (n, 2) array of node ids below size
+    def unique_edges(pairs: np.ndarray, size: int):
+        # sorting and dropping repeats is a lot faster than np.unique for millions of keys
+        keys = np.sort(pairs[:, 0] * size + pairs[:, 1])
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+        return keys // size, keys % size
+
+
+# Configuration model between two groups. The degrees of the smaller group are drawn
+# between min_deg and max_deg, the bigger group gets a sequence with the same sum like in
+# HavelHakimiDual. Sources are node ids of the smaller group (group 1 if both have the same
+# size), targets node ids of the bigger one. Random numbers are drawn from rng.
+class ConfigurationModelDual(HavelHakimiDual):
+    def __init__(
+        self, size1: int, size2: int, min_deg: int, max_deg: int, rng: np.random.Generator = None
+    ) -> None:
+        super().__init__(size1, size2, min_deg, max_deg, np_rng=rng)
+        self.sources = np.zeros(0, dtype=np.int64)
+        self.targets = np.zeros(0, dtype=np.int64)
+
+    def run(self):
+        small, big = sorted([self.size1, self.size2])
+        small_seq = self.np_rng.integers(self.min_deg, self.max_deg + 1, size=small)
+        big_seq = np.array(
+            self._create_sequence_with_sum(big, int(small_seq.sum())), dtype=np.int64
+        )
+        if self.size1 <= self.size2:
+            self.deg_seq1, self.deg_seq2 = small_seq, big_seq
+        else:
+            self.deg_seq1, self.deg_seq2 = big_seq, small_seq
+        targets = np.repeat(np.arange(big), big_seq)
+        self.np_rng.shuffle(targets)
+        pairs = np.stack([np.repeat(np.arange(small), small_seq), targets], axis=1)
+        self.sources, self.targets = ConfigurationModel.unique_edges(pairs, big)
+        return self.sources, self.targets
@@ -0,0 +1,70 @@
+import random
+from typing import List
+
+
+# Node ids 0..n-1 grouped by their remaining degree, one bucket per degree.
+# Taking the nodes with the highest degrees and lowering degrees costs O(1) per node
+# (plus the empty buckets skipped), so Havel-Hakimi doesn't have to re-sort after every
+# node. Nodes with equal degrees are picked in random order, drawn from rng.
+class DegreeBuckets:
+    def __init__(self, node_ids: List[int], degrees: List[int], rng: random.Random = None) -> None:
+        self.rng = rng or random
+        self.buckets: List[List[int]] = [[] for _ in range(max(degrees, default=0) + 1)]
+        self.degree = [0] * len(node_ids)
+        # index of every node in its bucket
+        self.position = [0] * len(node_ids)
+        self.max_degree = 0
+        for node, deg in zip(node_ids, degrees):
+            self.degree[node] = deg
+            self._add(node)
+        self._update_max_degree()
+
+    def _add(self, node: int):
+        bucket = self.buckets[self.degree[node]]
+        self.position[node] = len(bucket)
+        bucket.append(node)
+        if self.degree[node] > self.max_degree:
+            self.max_degree = self.degree[node]
+
+    def _remove(self, node: int):
+        bucket = self.buckets[self.degree[node]]
+        last = bucket.pop()
+        if last != node:
+            index = self.position[node]
+            bucket[index] = last
+            self.position[last] = index
+
+    def _update_max_degree(self):
+        while self.max_degree > 0 and not self.buckets[self.max_degree]:
+            self.max_degree -= 1
+
+    # removes and returns a random node with the highest degree
+    def pop_highest(self) -> int:
+        bucket = self.buckets[self.max_degree]
+        node = bucket[self.rng.randrange(len(bucket))]
+        self.remove(node)
+        return node
+
+    def remove(self, node: int):
+        self._remove(node)
+        self._update_max_degree()
+
+    # n nodes with the highest degrees above 0, fewer if there aren't enough of them
+    def highest(self, n: int) -> List[int]:
+        selected = []
+        deg = self.max_degree
+        while len(selected) < n and deg > 0:
+            bucket = self.buckets[deg]
+            if len(bucket) <= n - len(selected):
+                selected.extend(bucket)
+            else:
+                selected.extend(self.rng.sample(bucket, n - len(selected)))
+            deg -= 1
+        return selected
+
+    def decrement(self, nodes: List[int]):
+        for node in nodes:
+            self._remove(node)
+            self.degree[node] -= 1
+            self._add(node)
+        self._update_max_degree()
@@ -0,0 +1,82 @@
+from typing import List
+
+import numpy as np
+
+
+# https://en.wikipedia.org/wiki/Erd%C5%91s%E2%80%93Gallai_theorem
+# https://en.wikipedia.org/wiki/Gale%E2%80%93Ryser_theorem
+# All checks are O(n) with prefix sums over the sorted sequence and a counting array
+# of the degrees, instead of summing up the sequence again for every k.
+class ErdosGallai:
+    # for a degree sequence sorted in descending order, returns for every k = 1..n
+    # the sum of the k highest degrees and sum(min(k, d)) over all degrees
+    def _sums(seq: np.ndarray, n: int):
+        counts = np.bincount(seq, minlength=n + 1)
+        # at_least[v] = number of degrees >= v, below[v] = sum of all degrees <= v
+        at_least = counts[::-1].cumsum()[::-1]
+        below = np.cumsum(np.arange(len(counts)) * counts)
+        k = np.arange(1, n + 1)
+        return k, at_least[k], below[k - 1] + k * at_least[k]
+
+    def is_graphic(seq) -> bool:
+        seq = np.sort(np.asarray(seq, dtype=np.int64))[::-1]
+        n = len(seq)
+        if n == 0:
+            return True
+        if seq.sum() % 2 != 0 or seq[0] > n - 1 or seq[-1] < 0:
+            return False
+        k, at_least, min_sums = ErdosGallai._sums(seq, n)
+        prefix = np.concatenate(([0], np.cumsum(seq)))
+        # sum(min(k, d)) over the first k degrees, the first min(k, at_least) of them are >= k
+        m = np.minimum(k, at_least)
+        head = k * m + prefix[k] - prefix[m]
+        return bool((prefix[k] <= k * (k - 1) + min_sums - head).all())
+
+    # whether a bipartite graph with the degrees seq1 on one side and seq2 on the other exists
+    def is_bigraphic(seq1, seq2) -> bool:
+        seq1 = np.sort(np.asarray(seq1, dtype=np.int64))[::-1]
+        seq2 = np.asarray(seq2, dtype=np.int64)
+        if seq1.sum() != seq2.sum():
+            return False
+        if len(seq1) == 0:
+            return True
+        if seq1[-1] < 0 or seq2.min(initial=0) < 0 or seq1[0] > len(seq2):
+            return False
+        size = max(len(seq1), int(seq2.max(initial=0)))
+        k, _, min_sums = ErdosGallai._sums(seq2, size)
+        return bool((np.cumsum(seq1) <= min_sums[: len(seq1)]).all())
+
+    # the sequence after lowering the highest degree by one, amount times
+    def _lower_highest(seq: np.ndarray, amount: int) -> np.ndarray:
+        counts = np.bincount(seq)
+        levels = np.arange(len(counts))
+        above = counts[::-1].cumsum()[::-1] - counts  # number of degrees > level
+        below = np.cumsum(levels * counts)
+        removed = below[-1] - below - levels * above
+        # lowest level that capping everything above it doesn't remove more than amount
+        level = int(np.argmax(removed <= amount))
+        result = np.minimum(seq, level)
+        # the rest is taken from the degrees at the level, lowering the last of them
+        # keeps the sequence sorted
+        at_level = int((seq >= level).sum())
+        result[at_level - (amount - removed[level]) : at_level] -= 1
+        return result
+
+    # lowers the highest degrees until the sequence is graphic, same as decrementing the
+    # first degree of the sorted sequence until it is. Once a lowered sequence is graphic,
+    # lowering further by an even amount keeps it graphic, so the amount can be found by
+    # a binary search instead of checking after every single step
+    def make_graphic(seq: List[int]) -> List[int]:
+        seq = np.sort(np.asarray(seq, dtype=np.int64))[::-1]
+        if ErdosGallai.is_graphic(seq):
+            return seq.tolist()
+        parity = int(seq.sum() % 2)
+        low = 0
+        high = (int(seq.sum()) - parity) // 2
+        while low < high:
+            middle = (low + high) // 2
+            if ErdosGallai.is_graphic(ErdosGallai._lower_highest(seq, parity + 2 * middle)):
+                high = middle
+            else:
+                low = middle + 1
+        return ErdosGallai._lower_highest(seq, parity + 2 * low).tolist()
@@ -1,11 +1,25 @@
 import random
 from typing import List
-from numpy.random import multinomial
 import numpy as np
 
+from .degree_buckets import DegreeBuckets
+from .erdos_gallai import ErdosGallai
 
+
+# random numbers are drawn from rng, the random module if it is None, and from the numpy
+# generator np_rng
 class HavelHakimiDual:
-    def __init__(self, size1: int, size2: int, min_deg: int, max_deg: int) -> None:
+    def __init__(
+        self,
+        size1: int,
+        size2: int,
+        min_deg: int,
+        max_deg: int,
+        rng: random.Random = None,
+        np_rng: np.random.Generator = None,
+    ) -> None:
+        self.rng = rng or random
+        self.np_rng = np_rng or np.random.default_rng()
         self.size1 = size1
         self.size2 = size2
         self.min_deg = min_deg
@@ -24,44 +38,37 @@ class HavelHakimiDual:
         self._sort_sequence()
         self.node_id_seq1 = list(range(0, self.size1))
         self.node_id_seq2 = list(range(0, self.size2))
-        random.shuffle(self.node_id_seq1)
-        random.shuffle(self.node_id_seq2)
+        self.rng.shuffle(self.node_id_seq1)
+        self.rng.shuffle(self.node_id_seq2)
         if not self._erdos_gallai():
             raise ArithmeticError
-        while sum(self.deg_seq1) + sum(self.deg_seq2) != 0:
-            self._connect_highest_deg_node()
+        self._connect_nodes()
         return self.edges
 
-    # https://en.wikipedia.org/wiki/Erd%C5%91s%E2%80%93Gallai_theorem
     # This should always return true, because the second degree sequence is constructed in a way that the resulting sequences are always graphic
     def _erdos_gallai(self) -> bool:
-        for n, seq in zip([self.size1, self.size2], [self.deg_seq2, self.deg_seq1]):
-            for k in range(1, n + 1):
-                if sum(seq[:k]) > k * (k - 1) + sum(min(k, d) for d in seq[k + 1 :]):
-                    return False
-        return True
+        return ErdosGallai.is_bigraphic(self.deg_seq1, self.deg_seq2)
 
-    # always connect from smaller group
-    def _connect_highest_deg_node(self):
+    # always connect from smaller group, its nodes in order of their degree
+    # to the nodes of the bigger group with the highest remaining degrees
+    def _connect_nodes(self):
         if self.size1 <= self.size2:
-            node = self.node_id_seq1.pop(0)
-            deg = self.deg_seq1.pop(0)
-            targets = self._get_highest_n_nodes(deg, self.deg_seq2, self.node_id_seq2)
-            for target in targets:
-                self.deg_seq2[self.node_id_seq2.index(target)] -= 1
+            sources = zip(self.node_id_seq1, self.deg_seq1)
+            buckets = DegreeBuckets(self.node_id_seq2, self.deg_seq2, self.rng)
         else:
-            node = self.node_id_seq2.pop(0)
-            deg = self.deg_seq2.pop(0)
-            targets = self._get_highest_n_nodes(deg, self.deg_seq1, self.node_id_seq1)
-            for target in targets:
-                self.deg_seq1[self.node_id_seq1.index(target)] -= 1
-        self.edges[node] = targets
-        self._sort_sequence()
+            sources = zip(self.node_id_seq2, self.deg_seq2)
+            buckets = DegreeBuckets(self.node_id_seq1, self.deg_seq1, self.rng)
+        for node, deg in sources:
+            if buckets.max_degree == 0:
+                break
+            targets = buckets.highest(deg)
+            buckets.decrement(targets)
+            self.edges[node] = targets
 
     def _create_sequence(self):
         seq = []
         for _ in range(0, min(self.size1, self.size2)):
-            seq.append(random.randint(self.min_deg, self.max_deg))
+            seq.append(self.rng.randint(self.min_deg, self.max_deg))
         if self.size1 < self.size2:
             self.deg_seq1 = seq
             self.deg_seq2 = self._create_sequence_with_sum(self.size2, sum(seq))
@@ -70,18 +77,31 @@ class HavelHakimiDual:
             self.deg_seq1 = self._create_sequence_with_sum(self.size1, sum(seq))
 
     def _create_sequence_with_sum(self, size: int, _sum: int):
-        seq: List[int] = np.random.randint(self.min_deg, self.max_deg + 1, size=(size)).tolist()
-        while sum(seq) != _sum:
-            if sum(seq) > _sum:
-                # > 0 instead of > min_deg if all nodes have min_deg
-                # because the bigger group will have some nodes with less than min_deg connections
-                choices = [x for x in seq if x > self.min_deg]
-                if len(choices) == 0:
-                    choices = [x for x in seq if x > 0]
-                seq[seq.index(random.choice(choices))] -= 1
-            else:
-                seq[seq.index(random.choice([x for x in seq if x < self.max_deg]))] += 1
-        return seq
+        seq = self.np_rng.integers(self.min_deg, self.max_deg + 1, size=(size))
+        difference = _sum - int(seq.sum())
+        if difference > 0:
+            seq += self._spread(difference, self.max_deg - seq)
+        elif difference < 0:
+            capacity = seq - self.min_deg
+            lowered = min(-difference, int(capacity.sum()))
+            seq -= self._spread(lowered, capacity)
+            # 0 instead of min_deg if all nodes have min_deg
+            # because the bigger group will have some nodes with less than min_deg connections
+            seq -= self._spread(-difference - lowered, seq)
+        return seq.tolist()
+
+    # spreads amount units over the positions, every unit goes to a random position that
+    # hasn't reached its capacity yet. Units beyond a capacity are spread again
+    def _spread(self, amount: int, capacity: np.ndarray) -> np.ndarray:
+        added = np.zeros_like(capacity)
+        while amount > 0:
+            free = np.flatnonzero(added < capacity)
+            # multinomial with equal chances, counting uniform draws is faster for many positions
+            units = np.bincount(self.np_rng.integers(len(free), size=amount), minlength=len(free))
+            units = np.minimum(units, capacity[free] - added[free])
+            added[free] += units
+            amount -= int(units.sum())
+        return added
 
     def _sort_sequence(self):
         self.node_id_seq1 = [
@@ -92,29 +112,3 @@ class HavelHakimiDual:
             x for _, x in sorted(zip(self.deg_seq2, self.node_id_seq2), reverse=True)
         ]
         self.deg_seq2.sort(reverse=True)
-
-    def _get_highest_n_nodes(self, n: int, deg_seq: List[int], node_id_seq: List[int]) -> List[int]:
-        if n >= len(deg_seq):
-            raise ArithmeticError
-        max = deg_seq[0]
-        cur = max
-        viable_nodes = []
-        selected_nodes = []
-        i = 0
-        while i < n:
-            # add all viable nodes, if next viable nodes have lower deg
-            selected_nodes.extend(viable_nodes)
-            viable_nodes.clear()
-            while cur == max:
-                viable_nodes.append(node_id_seq[i])
-                i += 1
-                try:
-                    cur = deg_seq[i]
-                except IndexError:
-                    cur = -1
-            if cur == -1:
-                break
-            max = deg_seq[i]
-            cur = max
-        selected_nodes.extend(random.sample(viable_nodes, n - len(selected_nodes)))
-        return selected_nodes
@@ -0,0 +1,44 @@
+import numpy as np
+
+
+# https://en.wikipedia.org/wiki/Stochastic_block_model
+# Samples the edges between many pairs of groups in one vectorized pass. Like in
+# HavelHakimiDual every node of the smaller group of a pair gets a random degree between
+# the min and max degree of the pair, the other end of each of its edges is a uniformly
+# random node of the bigger group, so the degrees there follow a binomial distribution
+# with the same mean. Duplicate edges are removed afterwards.
+# Pair p connects small_sizes[p] nodes with big_sizes[p] nodes. run() returns the pair,
+# the node id in the smaller group and the node id in the bigger group of every edge,
+# sorted by pair. Random numbers are drawn from rng.
+class StochasticBlockModel:
+    def __init__(
+        self, small_sizes, big_sizes, min_degs, max_degs, rng: np.random.Generator = None
+    ) -> None:
+        self.rng = rng or np.random.default_rng()
+        self.small_sizes = np.asarray(small_sizes, dtype=np.int64)
+        self.big_sizes = np.asarray(big_sizes, dtype=np.int64)
+        self.min_degs = np.asarray(min_degs, dtype=np.int64)
+        self.max_degs = np.asarray(max_degs, dtype=np.int64)
+        self.pairs = np.zeros(0, dtype=np.int64)
+        self.sources = np.zeros(0, dtype=np.int64)
+        self.targets = np.zeros(0, dtype=np.int64)
+
+    def run(self):
+        pair_count = len(self.small_sizes)
+        # pair and id of every node on the smaller side of all pairs
+        node_pairs = np.repeat(np.arange(pair_count), self.small_sizes)
+        starts = np.cumsum(self.small_sizes) - self.small_sizes
+        nodes = np.arange(len(node_pairs)) - starts[node_pairs]
+        degrees = self.rng.integers(self.min_degs[node_pairs], self.max_degs[node_pairs] + 1)
+
+        pairs = np.repeat(node_pairs, degrees)
+        sources = np.repeat(nodes, degrees)
+        targets = self.rng.integers(0, self.big_sizes[pairs]) if len(pairs) else pairs
+
+        small = max(int(self.small_sizes.max(initial=0)), 1)
+        big = max(int(self.big_sizes.max(initial=0)), 1)
+        keys = np.sort((pairs * small + sources) * big + targets)
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+        self.pairs, rest = np.divmod(keys, small * big)
+        self.sources, self.targets = np.divmod(rest, big)
+        return self.pairs, self.sources, self.targets
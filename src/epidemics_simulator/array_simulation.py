@@ -0,0 +1,281 @@
+from typing import List
+
+import numpy as np
+
+from src.epidemics_simulator.storage import CompiledNetwork, Disease, SimStats
+from src.epidemics_simulator.timing_wheel import TimingWheel
+
+
+# Same public api as Simulation, but all node state lives in numpy arrays indexed by
+# the position of the node in the active groups. Infections for all infectious edges
+# are drawn in one batch per step instead of one random.uniform call per edge.
+class ArraySimulation:
+    # sources with at least this many contacts sample their hits binomially
+    HUB_DEGREE = 32
+
+    def __init__(self, network, seed=None) -> None:
+        # accepts a Network or an already compiled network
+        self.compiled: CompiledNetwork = (
+            network if isinstance(network, CompiledNetwork) else network.compile()
+        )
+        self.healthy_color = network.healthy_color
+        self.cured_color = network.cured_color
+        self.vaccinated_color = network.vaccinated_color
+        self.deceased_color = network.deceased_color
+        self.diseases: List[Disease] = network.diseases
+        self.network = network
+        self.rng = np.random.default_rng(seed)
+        self.current_step = 0
+        self._build_arrays()
+        self.stats = SimStats.from_compiled(self.compiled, self.diseases)
+
+    def _build_arrays(self):
+        compiled = self.compiled
+        self.group_ids = compiled.group_ids
+        self.group_offsets = compiled.group_offsets
+        self.vaccination_rate = compiled.vaccination_rate
+        self.max_vaccination_amount = compiled.max_vaccination_amount
+        self.size = compiled.size
+        self.node_group = compiled.node_group
+        self.indptr = compiled.indptr
+        self.indices = compiled.indices
+
+        self.disease_ids = [disease.id for disease in self.diseases]
+        self.duration = np.array([d.duration for d in self.diseases], dtype=np.int64)
+        self.cure_chance = np.array([d.cure_chance for d in self.diseases], dtype=np.float64)
+        self.fatality_rate = np.array([d.fatality_rate for d in self.diseases], dtype=np.float64)
+        self.vaccinated_fatality_rate = np.array(
+            [d.vaccinated_fatality_rate for d in self.diseases], dtype=np.float64
+        )
+        self.infection_rate = np.array([d.infection_rate for d in self.diseases], dtype=np.float64)
+        self.reinfection_rate = np.array(
+            [d.reinfection_rate for d in self.diseases], dtype=np.float64
+        )
+        self.vaccinated_infection_rate = np.array(
+            [d.vaccinated_infection_rate for d in self.diseases], dtype=np.float64
+        )
+        self.infectiousness_factor = np.array(
+            [d.infectiousness_factor for d in self.diseases], dtype=np.float64
+        )
+        self.immunity_period = np.array([d.immunity_period for d in self.diseases], dtype=np.int64)
+
+        self.alive = np.ones(self.size, dtype=bool)
+        self.disease = np.full(self.size, -1, dtype=np.int16)  # -1 = not infected
+        self.infection_step = np.zeros(self.size, dtype=np.int64)
+        self.vaccinated = np.zeros(self.size, dtype=bool)
+        self.immune = np.zeros(self.size, dtype=bool)
+        self.immunity_until_step = np.zeros(self.size, dtype=np.int64)
+        self.num_of_infections = np.zeros(self.size, dtype=np.int32)
+        self.vaccinated_amount = np.zeros(len(self.group_ids), dtype=np.int64)
+        # index arrays of nodes whose infection or immunity ends at a step
+        self.resolutions = TimingWheel()
+        self.immunity_ends = TimingWheel()
+
+    @property
+    def infected_time(self):
+        return np.where(self.disease >= 0, self.current_step - self.infection_step, 0)
+
+    def simulate_step(self):
+        self.current_step += 1
+        self.stats.new_step()
+        ended = self.immunity_ends.advance()
+        if ended:
+            self.immune[np.concatenate(ended)] = False
+        self._vaccinate()
+        resolved = self.resolutions.advance()
+        if resolved:
+            self._resolve(np.concatenate(resolved))
+        self._transmit(np.flatnonzero(self.disease >= 0))
+        self.stats.finish_step()
+
+    def _vaccinate(self):
+        remaining = self.max_vaccination_amount - self.vaccinated_amount
+        for i in np.flatnonzero((remaining > 0) & (self.vaccination_rate > 0)):
+            start = self.group_offsets[i]
+            pool = np.flatnonzero(~self.vaccinated[start : self.group_offsets[i + 1]]) + start
+            rate = min(self.vaccination_rate[i], 1)
+            amount = min(self.rng.binomial(len(pool), rate), remaining[i])
+            if amount == 0:
+                continue
+            self.vaccinated[self.rng.choice(pool, amount, replace=False)] = True
+            self.vaccinated_amount[i] += amount
+            self.stats.group_stats[self.group_ids[i]].add_vaccination(int(amount))
+
+    def _resolve(self, nodes):
+        disease = self.disease[nodes]
+        vaccinated = self.vaccinated[nodes]
+        fatality = np.where(
+            vaccinated, self.vaccinated_fatality_rate[disease], self.fatality_rate[disease]
+        )
+        dies = self.rng.random(len(nodes)) <= fatality
+        dead = nodes[dies]
+        cured = nodes[~dies]
+
+        self.alive[dead] = False
+        dead_vaccinated = self.vaccinated[dead]
+        total = np.bincount(self.node_group[dead], minlength=len(self.group_ids))
+        vacc = np.bincount(self.node_group[dead[dead_vaccinated]], minlength=len(self.group_ids))
+        # unvaccinated deaths count against the vaccination cap, same as in Simulation
+        self.vaccinated_amount += total - vacc
+        for group, amount, vacc_amount in zip(self.group_ids, total, vacc):
+            if amount:
+                stats = self.stats.group_stats[group]
+                stats.add_death(int(amount))
+                stats.add_vacc_death(int(vacc_amount))
+                stats.add_unvacc_death(int(amount - vacc_amount))
+
+        for group, disease_id, amount in self._count(cured):
+            self.stats.group_stats[group].add_cure(disease_id, amount)
+        self.num_of_infections[cured] += 1
+        self.immunity_until_step[cured] = (
+            self.current_step + 1 + self.immunity_period[self.disease[cured]]
+        )
+        self.immune[cured] = True
+        self._schedule(self.immunity_ends, cured, self.immunity_until_step[cured])
+        self.disease[nodes] = -1
+
+    # schedules every node at its step, one index array per distinct step
+    def _schedule(self, wheel: TimingWheel, nodes, steps):
+        order = np.argsort(steps, kind="stable")
+        steps, starts = np.unique(steps[order], return_index=True)
+        for step, group in zip(steps, np.split(nodes[order], starts[1:])):
+            wheel.schedule(int(step), group)
+
+    def _infect(self, nodes, disease):
+        self.disease[nodes] = disease
+        self.infection_step[nodes] = self.current_step
+        self._add_infections(nodes)
+        disease = self.disease[nodes]
+        cure_chance = self.cure_chance[disease]
+        # an infection can end once it lasted duration steps, after that it ends
+        # with cure_chance every step, so the wait is geometric
+        ending = cure_chance > 0
+        nodes = nodes[ending]
+        wait = self.rng.geometric(cure_chance[ending])
+        steps = self.current_step + np.maximum(self.duration[disease[ending]], 1) + wait - 1
+        self._schedule(self.resolutions, nodes, steps)
+
+    def _transmit(self, sources):
+        rate = self._infection_rate(sources)
+        degrees = self.indptr[sources + 1] - self.indptr[sources]
+        hub = degrees >= self.HUB_DEGREE
+
+        # one draw per susceptible contact
+        regular, targets = self._contacts(sources[~hub])
+        rates = np.repeat(rate[~hub], degrees[~hub])
+        susceptible = self._susceptible(targets)
+        regular = regular[susceptible]
+        targets = targets[susceptible]
+        hits = self.rng.random(len(targets)) <= rates[susceptible]
+        hit_sources = [regular[hits]]
+        hit_targets = [targets[hits]]
+
+        # hubs draw how many of their contacts are hit and only pick those,
+        # filtering for susceptibility afterwards gives every contact the same chance
+        amounts = self.rng.binomial(degrees[hub], np.minimum(rate[hub], 1))
+        for source, degree, amount in zip(sources[hub], degrees[hub], amounts):
+            if amount == 0:
+                continue
+            positions = self.indptr[source] + self.rng.choice(degree, amount, replace=False)
+            targets = self.indices[positions]
+            targets = targets[self._susceptible(targets)]
+            hit_sources.append(np.full(len(targets), source))
+            hit_targets.append(targets)
+
+        sources = np.concatenate(hit_sources)
+        targets = np.concatenate(hit_targets)
+        # a target hit by several sources is infected by a random one of them,
+        # like the first hit in the shuffled loop of Simulation
+        order = self.rng.permutation(len(targets))
+        targets, first = np.unique(targets[order], return_index=True)
+        self._infect(targets, self.disease[sources[order][first]])
+
+    def _susceptible(self, nodes):
+        return self.alive[nodes] & (self.disease[nodes] < 0) & ~self.immune[nodes]
+
+    def _infection_rate(self, sources):
+        disease = self.disease[sources]
+        rate = np.where(
+            self.vaccinated[sources],
+            self.vaccinated_infection_rate[disease],
+            np.where(
+                self.num_of_infections[sources] > 0,
+                self.reinfection_rate[disease],
+                self.infection_rate[disease],
+            ),
+        )
+        infected_time = self.current_step - self.infection_step[sources]
+        return rate * self.infectiousness_factor[disease] ** infected_time
+
+    # returns every (source, target) pair along the edges of the given sources
+    def _contacts(self, sources):
+        starts = self.indptr[sources]
+        degrees = self.indptr[sources + 1] - starts
+        ends = np.cumsum(degrees)
+        positions = np.arange(ends[-1] if len(ends) else 0)
+        positions += np.repeat(starts - ends + degrees, degrees)
+        return np.repeat(sources, degrees), self.indices[positions]
+
+    def _add_infections(self, nodes):
+        vaccinated = self.vaccinated[nodes]
+        for group, disease_id, amount in self._count(nodes):
+            self.stats.group_stats[group].add_infection(disease_id, amount)
+        for group, disease_id, amount in self._count(nodes[vaccinated]):
+            self.stats.group_stats[group].add_vacc_infection(disease_id, amount)
+        for group, disease_id, amount in self._count(nodes[~vaccinated]):
+            self.stats.group_stats[group].add_unvacc_infection(disease_id, amount)
+        for group, disease_id, amount in self._count(nodes[self.num_of_infections[nodes] > 1]):
+            self.stats.group_stats[group].add_reinfection(disease_id, amount)
+
+    # counts nodes per (group, disease) and yields all non zero counts
+    def _count(self, nodes):
+        if len(nodes) == 0:
+            return
+        disease_count = len(self.disease_ids)
+        keys = self.node_group[nodes].astype(np.int64) * disease_count + self.disease[nodes]
+        counts = np.bincount(keys, minlength=len(self.group_ids) * disease_count)
+        for key in np.flatnonzero(counts):
+            group, disease = divmod(int(key), disease_count)
+            yield self.group_ids[group], self.disease_ids[disease], int(counts[key])
+
+    def create_color_seq(self):
+        palette = np.array(
+            [
+                self.deceased_color,
+                self.vaccinated_color,
+                self.cured_color,
+                self.healthy_color,
+                *[disease.color for disease in self.diseases],
+            ],
+            dtype=object,
+        )
+        codes = np.select(
+            [~self.alive, self.disease >= 0, self.vaccinated, self.num_of_infections > 0],
+            [0, 4 + self.disease.astype(np.int64), 1, 2],
+            3,
+        )
+        all = palette[codes].tolist()
+        colors = {}
+        for i, group in enumerate(self.group_ids):
+            colors[group] = all[self.group_offsets[i] : self.group_offsets[i + 1]]
+        return colors, all
+
+    def init_simulation(self):
+        self.stats = SimStats.from_compiled(self.compiled, self.diseases)
+        self.current_step = 0
+        self.alive[:] = True
+        self.disease[:] = -1
+        self.infection_step[:] = 0
+        self.vaccinated[:] = False
+        self.immune[:] = False
+        self.immunity_until_step[:] = 0
+        self.resolutions.clear()
+        self.immunity_ends.clear()
+        self.num_of_infections[:] = 0
+        self.vaccinated_amount[:] = 0
+        nodes = self.rng.permutation(self.size)
+        start = 0
+        for i, disease in enumerate(self.diseases):
+            self._infect(nodes[start : start + disease.initial_infection_count], i)
+            start += disease.initial_infection_count
+        self.stats.finish_step()
@@ -0,0 +1,132 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+import numpy as np
+
+from src.epidemics_simulator.array_simulation import ArraySimulation
+from src.epidemics_simulator.storage import SharedNetwork, SimStats
+from src.epidemics_simulator.storage.sim_stats import GroupSimStats
+
+# compiled network of the current worker process, set once by _init_worker
+_worker_network = None
+
+
+def _init_worker(handle):
+    global _worker_network
+    _worker_network = handle.attach()
+
+
+def _run_replicate(seed, steps: int, engine=ArraySimulation) -> SimStats:
+    sim = engine(_worker_network, seed=seed)
+    sim.init_simulation()
+    for _ in range(steps):
+        sim.simulate_step()
+    return sim.stats
+
+
+# Runs independent replicates of ArraySimulation (or another engine with the same
+# constructor, e.g. GillespieSimulation) on one built network.
+# The network is compiled once and published through shared memory, the workers attach
+# to it on startup. Each replicate gets its own seed so the result does not depend on
+# the worker count.
+def run_ensemble(
+    network, replicates: int, steps: int, workers: int = 1, seed=None, engine=ArraySimulation
+):
+    global _worker_network
+    compiled = network.compile()
+    seeds = np.random.SeedSequence(seed).spawn(replicates)
+    if workers <= 1:
+        _worker_network = compiled
+        stats = [_run_replicate(s, steps, engine) for s in seeds]
+        _worker_network = None
+        return EnsembleResult(stats)
+    with SharedNetwork(compiled) as shared:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(shared.handle,)
+        ) as executor:
+            stats = list(
+                executor.map(_run_replicate, seeds, [steps] * replicates, [engine] * replicates)
+            )
+    return EnsembleResult(stats)
+
+
+class EnsembleResult:
+    DISEASE_COUNTERS = [
+        "infections",
+        "reinfections",
+        "vacc_infections",
+        "unvacc_infections",
+        "cures",
+    ]
+    COUNTERS = ["vaccinations", "deaths", "vacc_deaths", "unvacc_deaths"]
+
+    def __init__(self, stats: List[SimStats]) -> None:
+        self.stats = stats
+
+    @property
+    def group_ids(self):
+        return list(self.stats[0].group_stats.keys()) if self.stats else []
+
+    # per step values of one counter for every replicate, shape (replicates, steps + 1)
+    def series(self, group_id: str, counter: str, disease_id: str = None) -> np.ndarray:
+        values = []
+        for stats in self.stats:
+            value = getattr(stats.group_stats[group_id], counter)
+            values.append(value[disease_id] if counter in self.DISEASE_COUNTERS else value)
+        return np.array(values, dtype=np.float64)
+
+    def mean(self, group_id: str, counter: str, disease_id: str = None) -> np.ndarray:
+        return self.series(group_id, counter, disease_id).mean(axis=0)
+
+    # shape (len(q), steps + 1)
+    def quantiles(
+        self, group_id: str, counter: str, disease_id: str = None, q=(0.05, 0.5, 0.95)
+    ) -> np.ndarray:
+        return np.quantile(self.series(group_id, counter, disease_id), q, axis=0)
+
+    # mean and quantile band of every counter as
+    # {group id: {counter: {"mean": ..., "quantiles": ...}}},
+    # bands of disease counters are keyed by disease id in between
+    def bands(self, q=(0.05, 0.5, 0.95)):
+        bands = {}
+        for group_id in self.group_ids:
+            group_bands = {}
+            group_stats = self.stats[0].group_stats[group_id]
+            for counter in self.DISEASE_COUNTERS:
+                group_bands[counter] = {}
+                for disease_id in getattr(group_stats, counter):
+                    series = self.series(group_id, counter, disease_id)
+                    group_bands[counter][disease_id] = {
+                        "mean": series.mean(axis=0),
+                        "quantiles": np.quantile(series, q, axis=0),
+                    }
+            for counter in self.COUNTERS:
+                series = self.series(group_id, counter)
+                group_bands[counter] = {
+                    "mean": series.mean(axis=0),
+                    "quantiles": np.quantile(series, q, axis=0),
+                }
+            bands[group_id] = group_bands
+        return bands
+
+    # SimStats holding the per step mean of all replicates, e.g. to save it as a stat file
+    def mean_stats(self) -> SimStats:
+        first = self.stats[0]
+        instance = SimStats(None)
+        instance.group_ids = list(first.group_ids)
+        instance.group_names = list(first.group_names)
+        instance.group_sizes = list(first.group_sizes)
+        instance.disease_ids = list(first.disease_ids)
+        instance.disease_names = list(first.disease_names)
+        for group_id, group_stats in first.group_stats.items():
+            mean = GroupSimStats(group_stats.size, group_stats.name, instance.disease_ids)
+            for counter in self.DISEASE_COUNTERS:
+                for disease_id in getattr(group_stats, counter):
+                    getattr(mean, counter)[disease_id] = self.mean(
+                        group_id, counter, disease_id
+                    ).tolist()
+            for counter in self.COUNTERS:
+                setattr(mean, counter, self.mean(group_id, counter).tolist())
+            instance.group_stats[group_id] = mean
+        instance._add_full_log_text()
+        return instance
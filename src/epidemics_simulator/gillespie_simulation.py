@@ -0,0 +1,167 @@
+import heapq
+import math
+
+import numpy as np
+
+from src.epidemics_simulator.array_simulation import ArraySimulation
+
+CONTACT = 0
+RESOLVE = 1
+IMMUNITY_END = 2
+
+
+# Continuous time engine for sparse outbreaks. Instead of visiting every infected node
+# each step, it keeps a priority queue of the next events (contacts of infected nodes,
+# infection ends, immunity ends) and only does work when one of them happens, following
+# the next reaction method. A per step infection chance p becomes the contact rate
+# -ln(1 - p), so the chance of at least one contact within a step stays p.
+# Events are binned into the step they happen in, so stats have the same per step
+# layout as the discrete engines, and the timing follows them: a node infected in step s
+# makes contacts during steps s + 1 until the step before its infection resolves, so
+# infections don't chain within a step. Vaccination still happens at the start of every step.
+class GillespieSimulation(ArraySimulation):
+    # per step chances are capped below 1 so contact rates stay finite
+    MAX_CHANCE = 1 - 1e-9
+
+    def _build_arrays(self):
+        super()._build_arrays()
+        self.infection_time = np.zeros(self.size, dtype=np.float64)
+        self.infection_end = np.zeros(self.size, dtype=np.float64)
+        # events of an infection that already ended are skipped by comparing this
+        self.infection_id = np.zeros(self.size, dtype=np.int64)
+        self.events = []
+        self.event_counter = 0
+
+    def simulate_step(self):
+        self.current_step += 1
+        self.stats.new_step()
+        self._vaccinate()
+        while self.events and self.events[0][0] <= self.current_step:
+            _, time, _, kind, node, infection = heapq.heappop(self.events)
+            if kind == IMMUNITY_END:
+                self.immune[node] = False
+            elif infection != self.infection_id[node] or self.disease[node] < 0:
+                continue
+            elif kind == RESOLVE:
+                self._resolve_node(node, time)
+            else:
+                self._contact(node, time)
+        self.stats.finish_step()
+
+    # events are handled in the step they are due in, by default the step their time falls in
+    def _push(self, time: float, kind: int, node: int, infection: int = 0, step: int = None):
+        self.event_counter += 1
+        if step is None:
+            step = math.ceil(time)
+        heapq.heappush(self.events, (step, time, self.event_counter, kind, node, infection))
+
+    def _contact(self, node: int, time: float):
+        start = self.indptr[node]
+        target = self.indices[start + self.rng.integers(self.indptr[node + 1] - start)]
+        if self._susceptible(target):
+            self._infect_node(target, self.disease[node], time)
+        self._schedule_contact(node, time)
+
+    def _schedule_contact(self, node: int, time: float):
+        degree = self.indptr[node + 1] - self.indptr[node]
+        if degree == 0:
+            return
+        disease = self.disease[node]
+        if self.vaccinated[node]:
+            base = self.vaccinated_infection_rate[disease]
+        elif self.num_of_infections[node] > 0:
+            base = self.reinfection_rate[disease]
+        else:
+            base = self.infection_rate[disease]
+        if base <= 0:
+            return
+        # the chance changes with the infected time, so the rate is constant only
+        # within a step of the infection, integrate it until the drawn amount is used up
+        remaining = self.rng.exponential()
+        end = self.infection_end[node]
+        factor = self.infectiousness_factor[disease]
+        infected_time = math.floor(time - self.infection_time[node]) + 1
+        while time < end:
+            boundary = min(self.infection_time[node] + infected_time, end)
+            chance = base * factor**infected_time
+            rate = -degree * math.log1p(-min(chance, self.MAX_CHANCE))
+            if rate <= 0:
+                return
+            if remaining <= rate * (boundary - time):
+                # never before the step after the infection
+                step = max(math.ceil(time + remaining / rate), self.infection_step[node] + 1)
+                self._push(time + remaining / rate, CONTACT, node, self.infection_id[node], step)
+                return
+            remaining -= rate * (boundary - time)
+            # -ln(1 - f * p) <= f * -ln(1 - p), so with an uncapped chance and f < 1 the rates
+            # of the following steps are bounded by a geometric series summing to
+            # rate * f / (1 - f). Infections without an end would otherwise loop forever once
+            # that is less than the amount left.
+            if math.isinf(end) and factor < 1 and chance < self.MAX_CHANCE:
+                if remaining > rate * factor / (1 - factor):
+                    return
+            time = boundary
+            infected_time += 1
+
+    def _infect_node(self, node: int, disease: int, time: float):
+        self.disease[node] = disease
+        # the infected time counts whole steps, like in the discrete engines
+        self.infection_time[node] = self.current_step
+        self.infection_step[node] = self.current_step
+        self.infection_id[node] += 1
+        group_stats = self.stats.group_stats[self.group_ids[self.node_group[node]]]
+        disease_id = self.disease_ids[disease]
+        group_stats.add_infection(disease_id)
+        if self.vaccinated[node]:
+            group_stats.add_vacc_infection(disease_id)
+        else:
+            group_stats.add_unvacc_infection(disease_id)
+        if self.num_of_infections[node] > 1:
+            group_stats.add_reinfection(disease_id)
+        cure_chance = self.cure_chance[disease]
+        if cure_chance > 0:
+            wait = self.rng.geometric(cure_chance)
+            resolution = self.current_step + max(self.duration[disease], 1) + wait - 1
+            self._push(resolution, RESOLVE, node, self.infection_id[node])
+            # no contacts in the step the infection resolves in
+            self.infection_end[node] = resolution - 1
+        else:
+            self.infection_end[node] = math.inf
+        self._schedule_contact(node, float(self.current_step))
+
+    def _resolve_node(self, node: int, time: float):
+        disease = self.disease[node]
+        group_stats = self.stats.group_stats[self.group_ids[self.node_group[node]]]
+        vaccinated = self.vaccinated[node]
+        fatality = (
+            self.vaccinated_fatality_rate[disease] if vaccinated else self.fatality_rate[disease]
+        )
+        self.disease[node] = -1
+        if self.rng.random() <= fatality:
+            self.alive[node] = False
+            group_stats.add_death()
+            if vaccinated:
+                group_stats.add_vacc_death()
+            else:
+                group_stats.add_unvacc_death()
+                # unvaccinated deaths count against the vaccination cap, same as in Simulation
+                self.vaccinated_amount[self.node_group[node]] += 1
+            return
+        group_stats.add_cure(self.disease_ids[disease])
+        self.num_of_infections[node] += 1
+        self.immune[node] = True
+        self.immunity_until_step[node] = self.current_step + 1 + self.immunity_period[disease]
+        # handled first in the step the node is susceptible again
+        step = int(self.immunity_until_step[node])
+        self._push(step - 1, IMMUNITY_END, node, step=step)
+
+    # initial infections of init_simulation go through the event queue as well
+    def _infect(self, nodes, disease):
+        for node in nodes:
+            self._infect_node(node, disease, float(self.current_step))
+
+    def init_simulation(self):
+        self.events.clear()
+        self.event_counter = 0
+        self.infection_id[:] = 0
+        super().init_simulation()
@@ -4,7 +4,7 @@ from PyQt5 import QtWidgets
 from PyQt5.QtCore import pyqtSignal, QUrl, QObject, QRunnable
 from PyQt5.QtWebEngineWidgets import *
 from src.epidemics_simulator.gui.ui_widget_creator import UiWidgetCreator
-from src.epidemics_simulator.storage import Project
+from src.epidemics_simulator.storage import NetworkCache, Project
 from PyQt5.QtGui import QDesktopServices
 class WorkerSignals(QObject):
     push_generate_to_dash: pyqtSignal = pyqtSignal(bool, bool)
@@ -12,9 +12,11 @@ class WorkerSignals(QObject):
     server_finshed: pyqtSignal = pyqtSignal()
     
 class NetworkGenerator(QRunnable):
-    def __init__(self, project: Project, signals: WorkerSignals, wait_for_server: bool):
+    def __init__(self, project: Project, signals: WorkerSignals, wait_for_server: bool, cache: NetworkCache, rebuild: bool):
         super(NetworkGenerator, self).__init__()
         self.project = project
+        self.cache = cache
+        self.rebuild = rebuild # Build new connections even if the network did not change
         self.signal = signals
         self.server_finished = not wait_for_server # If we should not wait for the server it will be true and the while in the run will be instantly be canceld
         self.connect_signals()
@@ -23,9 +25,14 @@ class NetworkGenerator(QRunnable):
         self.signal.server_finshed.connect(self.set_server_finished)
         
     def run(self):
-        self.signal.push_generate_to_dash.emit(False, True)
-        self.project.network.build()    
+        if self.rebuild:
+            self.project.network.build()
+            self.cache.store(self.project.network)
+        else:
+            self.cache.build(self.project.network, incremental=True)
         print("Local build finished.")
+        # the server attaches the pushed connections instead of building again
+        self.signal.push_generate_to_dash.emit(False, True)
         while not self.server_finished:
             time.sleep(0.5)
         self.signal.generation_finished.emit()
@@ -52,6 +59,7 @@ class UiDisplayGroup(QObject):
         self.generation_in_progress = False
         
         self.thread_pool = self.main_window.thread_pool
+        self.cache = NetworkCache()
         
         self.load_webview()
         self.connect_signals()
@@ -77,11 +85,13 @@ class UiDisplayGroup(QObject):
         self.webview.hide()    
         
     def start_generating(self):
+        rebuild = False
         if self.generated_once and not self.parent.changes_in_network and not self.main_window.disease_edit_tab.disease_changed:
             msg_box = UiWidgetCreator.show_qmessagebox("The network did not change.\nDo you want to build again?", "Building Betwork")
             result = msg_box.exec_()
             if result != QtWidgets.QMessageBox.AcceptRole:
                 return
+            rebuild = True
         total_nodes = self.get_node_count()
         if total_nodes == 0:
             msg_box = UiWidgetCreator.show_qmessagebox("No nodes to build the network.\nCreate network groups to build the network.", "No Network to Build", only_ok=True)
@@ -95,7 +105,7 @@ class UiDisplayGroup(QObject):
                 return
         print("Started local building.")
         self.generation_in_progress = True
-        thread = NetworkGenerator(self.project, self.worker_signals, self.main_window.website_handler.is_connected) # Only wait for server if it is connected
+        thread = NetworkGenerator(self.project, self.worker_signals, self.main_window.website_handler.is_connected, self.cache, rebuild) # Only wait for server if it is connected
         self.popup = UiWidgetCreator.create_generate_popup(self.main_window)
         self.start_time = time.time()
         self.thread_pool.start(thread)
@@ -151,16 +161,8 @@ class UiDisplayGroup(QObject):
         
         
     def get_network_info(self):
-        total_nodes = 0
-        total_connections = 0
-        for group in self.network.groups:
-            if not group.active:
-                continue
-            total_nodes += group.size
-            for node in group.members:
-                total_connections += node.int_conn_amount
-                total_connections += node.get_ext_conn_amount()
-        return total_nodes, int(total_connections/2)
+        compiled = self.network.compile()
+        return compiled.size, compiled.edge_count
 
     def unload(self):
         try:
@@ -43,6 +43,7 @@ class ChangeNetwork(QRunnable):
         
     def duplicate_group(self):
         new_group = NodeGroup(self.network, self.group.name, self.group.size, self.group.age, self.group.vaccination_rate, self.group.max_vaccination_rate, self.group.avrg_int_con, self.group.delta_int_con, self.group.color)
+        new_group.generator = self.group.generator
         self.network.add_group(new_group)
         for ext_group, value in self.group.avrg_ext_con.items():
             new_group.add_external_connection(ext_group, value, self.group.delta_ext_con[ext_group])
@@ -299,10 +299,11 @@ class UiNetworkEditor(QtWidgets.QMainWindow):
             tmp_project = Project(self.project.file_location)
             tmp_project.network = Network()
             tmp_project.network.name = self.project.network.name
-            data = {"data": tmp_project.to_dict(), "generate": True}
+            data = {"payload": tmp_project.to_bytes(), "generate": True}
             sub_rul = "update-data"
         else:
-            data = {"data": self.project.to_dict(), "generate": build}
+            # Serialized here, the project can change while the push is running
+            data = {"payload": self.project.to_bytes(include_edges=build), "generate": build}
             sub_rul = "update-data"
         self.website_handler.push_to_dash.emit(sub_rul, data)
         
@@ -6,6 +6,18 @@ import psutil
 import requests
 import os
 import sys
+import threading
+from src.epidemics_simulator.storage import Project
+
+# Keeps the connection to the server alive between pushes, one session per thread since
+# sessions are not thread-safe
+sessions = threading.local()
+
+
+def get_session() -> requests.Session:
+    if not hasattr(sessions, "session"):
+        sessions.session = requests.Session()
+    return sessions.session
 
 
 class WorkerSignals(QObject):
@@ -97,13 +109,22 @@ class PushToDash(QRunnable):
 
     def run(self):
         try:
-            response = requests.post(self.url, json=self.data)
+            if "payload" in self.data:
+                response = get_session().post(
+                    self.url,
+                    data=self.data["payload"],
+                    params={"generate": int(self.data["generate"])},
+                    headers={"Content-Type": Project.PAYLOAD_CONTENT_TYPE},
+                )
+            else:
+                response = get_session().post(self.url, json=self.data)
 
             # Check the response
             if response.status_code != 200:
                 print(f"POST request failed with status code {response.status_code}")
                 print(response.json())
-                print(self.data)
+                if "payload" not in self.data: # Binary payloads are not readable
+                    print(self.data)
         except requests.ConnectionError:
             self.signal.server_not_responding.emit()
         except Exception as e:
@@ -1,7 +1,16 @@
 import random
+from concurrent.futures import ProcessPoolExecutor
 from typing import List
+
+import numpy as np
 from src.epidemics_simulator.storage import Network, NodeGroup, Node
-from src.epidemics_simulator.algorithms import HavelHakimi, HavelHakimiDual
+from src.epidemics_simulator.algorithms import (
+    ConfigurationModel,
+    ConfigurationModelDual,
+    HavelHakimi,
+    HavelHakimiDual,
+    StochasticBlockModel,
+)
 
 # https://networkx.org/documentation/stable/reference/generated/networkx.generators.degree_seq.havel_hakimi_graph.html
 # https://www.quora.com/Is-it-possible-to-construct-the-graph-with-12-nodes-such-that-2-of-the-nodes-have-degree-3-and-the-remaining-nodes-have-a-degree-of-4
@@ -9,51 +18,145 @@ from src.epidemics_simulator.algorithms import HavelHakimi, HavelHakimiDual
 # https://en.wikipedia.org/wiki/Havel%E2%80%93Hakimi_algorithm#%3A~%3Atext%3DThe%20Havel%E2%80%93Hakimi%20algorithm%20is%2Csequence%20is%20exactly%20this%20list%3F
 
 
+# a random.Random and a numpy Generator seeded from a SeedSequence, so building leaves the
+# global random modules alone
+def _generators(seed: np.random.SeedSequence):
+    return random.Random(int(seed.generate_state(1, np.uint64)[0])), np.random.default_rng(seed)
+
+
+# Creates the internal connections of one group, run in the worker processes of
+# NetworkBuilder.build. The generators are seeded from the seed of the group, so the
+# result does not depend on which process builds which group.
+# Returns the edges as two arrays of member indices.
+def _generate_internal(size: int, _min: int, _max: int, generator: str, seed):
+    rng, np_rng = _generators(seed)
+    if generator == NodeGroup.CONFIGURATION_MODEL:
+        limit = max(size - 1, 0)
+        return ConfigurationModel(size, min(_min, limit), min(_max, limit), np_rng).run()
+    h = HavelHakimi(size, _min, _max, rng)
+    h.run()
+    sources = np.repeat(list(h.edges.keys()), [len(x) for x in h.edges.values()])
+    targets = np.array([x for targets in h.edges.values() for x in targets], dtype=np.int64)
+    return sources.astype(np.int64), targets
+
+
 class NetworkBuilder:
     def __init__(self, network):
         self.network: Network = network
+        # parameters the current connections were created with, by group id and by the
+        # frozenset of the ids of a connected pair
+        self.group_fingerprints = {}
+        self.pair_fingerprints = {}
 
-    def build(self):
-        self.clear()
-        for group in self.network.active_groups:
-            self._create_int_conn(group)
-        self._create_ext_conns()
+    # the internal connections of the groups are created in up to workers processes,
+    # each group and pair gets its own seed derived from seed and its ids, by default seed
+    # is drawn from the random module. An incremental build only creates the connections
+    # of groups and pairs whose parameters changed since the last build
+    def build(self, workers: int = 1, seed=None, incremental: bool = False):
+        if not incremental:
+            self.clear()
+        if seed is None:
+            seed = random.getrandbits(128)
+        groups = [
+            group
+            for group in self.network.active_groups
+            if self.group_fingerprints.get(group.id) != self._group_fingerprint(group)
+        ]
+        args = [self._int_conn_params(group) for group in groups]
+        seeds = [NetworkBuilder._derive_seed(seed, group.id) for group in groups]
+        if workers <= 1 or len(groups) <= 1:
+            results = [_generate_internal(*params, s) for params, s in zip(args, seeds)]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_generate_internal, *zip(*args), seeds))
+        for group, (sources, targets) in zip(groups, results):
+            group.clear_internal_connections()
+            group.add_internal_edges(sources, targets)
+            self.group_fingerprints[group.id] = self._group_fingerprint(group)
+        self._create_ext_conns(seed)
+        # groups might have been toggled since their connections were collected
+        for group in self.network.groups:
+            group.reset_adjacency()
+        self.network.reset_compiled()
+
+    def _derive_seed(seed, key: str) -> np.random.SeedSequence:
+        return np.random.SeedSequence(seed, spawn_key=tuple(key.encode()))
 
     def clear(self):
+        self.network.reset_compiled()
+        self.group_fingerprints.clear()
+        self.pair_fingerprints.clear()
         for group in self.network.active_groups:
             group.clear_connections()
 
-    def _create_int_conn(self, group: NodeGroup):
-        h = HavelHakimi(
-            group.size,
-            min(max(0, group.avrg_int_con - group.delta_int_con), group.size),
-            min(group.avrg_int_con + group.delta_int_con, group.size),
+    # records the current parameters as built, for connections that were loaded
+    def mark_built(self):
+        for group in self.network.active_groups:
+            self.group_fingerprints[group.id] = self._group_fingerprint(group)
+        self.pair_fingerprints = {
+            frozenset((pair[0].id, pair[1].id)): self._pair_fingerprint(*pair)
+            for pair in self._collect_ext_conns(self.network)
+        }
+
+    def _group_fingerprint(self, group: NodeGroup):
+        return self._int_conn_params(group)
+
+    def _pair_fingerprint(self, _from: NodeGroup, to: NodeGroup, _min: int, _max: int):
+        external = self.network.external_generator
+        return (
+            _from.id,
+            to.id,
+            _from.size,
+            to.size,
+            _min,
+            _max,
+            _from.generator,
+            to.generator,
+            external,
         )
-        h.run()
-        for node_id in h.edges.keys():
-            source_node: Node = group.get_member(group.id + "-" + str(node_id))
-            for target_node_id in h.edges[node_id]:
-                # target_node: Node = group.get_member(group.id + "-" + str(target_node_id))
-                source_node.add_int_connection(group.id + "-" + str(target_node_id))
-                # target_node.add_int_connection(group.id + "-" + str(node_id))
-
-    def _create_ext_conns(self):
-        all = self._collect_ext_conns(self.network)
-        for from_id in all.keys():
-            for params in all[from_id]:
-                target_id = params[0]
-                avrg = params[1]
-                delta = params[2]
-                self._add_ext_conn(
-                    _from=self.network.get_group_by_id(from_id),
-                    to=self.network.get_group_by_id(target_id),
-                    _min=max(0, avrg - delta),
-                    _max=avrg + delta,
-                )
-                # remove connections from target -> source so it isn't created twice
-                all[target_id] = [i for i in all[target_id] if i[0] != from_id]
-
-    def _add_ext_conn(self, _from: NodeGroup, to: NodeGroup, _min: int, _max: int):
+
+    def _int_conn_params(self, group: NodeGroup):
+        _min = min(max(0, group.avrg_int_con - group.delta_int_con), group.size)
+        _max = min(group.avrg_int_con + group.delta_int_con, group.size)
+        return group.size, _min, _max, group.generator
+
+    # pairs of groups only get new connections if their parameters or sizes changed,
+    # connections of pairs that were changed or are no longer connected are removed
+    def _create_ext_conns(self, seed):
+        fingerprints = {}
+        changed = []
+        for pair in self._collect_ext_conns(self.network):
+            key = frozenset((pair[0].id, pair[1].id))
+            fingerprints[key] = self._pair_fingerprint(*pair)
+            if self.pair_fingerprints.get(key) != fingerprints[key]:
+                changed.append(pair)
+        removed = set(self.pair_fingerprints) - set(fingerprints)
+        for key in removed | {frozenset((pair[0].id, pair[1].id)) for pair in changed}:
+            self._remove_pair(key)
+        self.pair_fingerprints = fingerprints
+        if self.network.external_generator == Network.STOCHASTIC_BLOCK_MODEL:
+            _, np_rng = _generators(NetworkBuilder._derive_seed(seed, "external"))
+            self._add_block_model_conns(changed, np_rng)
+            return
+        for _from, to, _min, _max in changed:
+            rng, np_rng = _generators(NetworkBuilder._derive_seed(seed, f"{_from.id}/{to.id}"))
+            self._add_ext_conn(_from, to, _min, _max, rng, np_rng)
+
+    def _remove_pair(self, key: frozenset):
+        groups = [self.network.get_group_by_id(id) for id in key]
+        for group, other in [groups, groups[::-1]]:
+            if group is not None and other is not None:
+                group.remove_external_connections(other)
+
+    def _add_ext_conn(
+        self,
+        _from: NodeGroup,
+        to: NodeGroup,
+        _min: int,
+        _max: int,
+        rng: random.Random,
+        np_rng: np.random.Generator,
+    ):
         if _from.size <= to.size:
             key_group = _from
             value_group = to
@@ -62,26 +165,56 @@ class NetworkBuilder:
             key_group = to
             value_group = _from
             max_size = _from.size
-        h = HavelHakimiDual(_from.size, to.size, min(_min, max_size), min(_max, max_size))
+        if NodeGroup.CONFIGURATION_MODEL in [_from.generator, to.generator]:
+            sources, targets = ConfigurationModelDual(
+                _from.size, to.size, min(_min, max_size), min(_max, max_size), np_rng
+            ).run()
+            key_group.add_external_edges(value_group, sources, targets)
+            return
+        h = HavelHakimiDual(
+            _from.size, to.size, min(_min, max_size), min(_max, max_size), rng, np_rng
+        )
         h.run()
-        for node_id in h.edges.keys():
-            source_node: Node = key_group.get_member(key_group.id + "-" + str(node_id))
-            for target_node_id in h.edges[node_id]:
-                # target_node: Node = value_group.get_member(
-                #     value_group.id + "-" + str(target_node_id)
-                # )
-                source_node.add_ext_connection(value_group.id + "-" + str(target_node_id))
-                # target_node.add_ext_connection(key_group.id + "-" + str(node_id))
-
-    # creates dict of all connections between groups
-    # contains tuples of (target_id, avrg, delta)
+        sources = np.repeat(list(h.edges.keys()), [len(x) for x in h.edges.values()])
+        targets = [x for targets in h.edges.values() for x in targets]
+        key_group.add_external_edges(value_group, sources, targets)
+
+    # samples the connections of all pairs at once, see StochasticBlockModel
+    def _add_block_model_conns(self, pairs, rng: np.random.Generator):
+        key_groups = []
+        value_groups = []
+        mins = []
+        maxs = []
+        for _from, to, _min, _max in pairs:
+            key_group, value_group = (_from, to) if _from.size <= to.size else (to, _from)
+            key_groups.append(key_group)
+            value_groups.append(value_group)
+            mins.append(min(_min, value_group.size))
+            maxs.append(min(_max, value_group.size))
+        pair_ids, sources, targets = StochasticBlockModel(
+            [group.size for group in key_groups],
+            [group.size for group in value_groups],
+            mins,
+            maxs,
+            rng,
+        ).run()
+        ends = np.searchsorted(pair_ids, np.arange(len(pairs)), side="right").tolist()
+        start = 0
+        for key_group, value_group, end in zip(key_groups, value_groups, ends):
+            key_group.add_external_edges(value_group, sources[start:end], targets[start:end])
+            start = end
+
+    # list of all connections between groups as (from group, to group, min degree, max degree),
+    # each pair only once with the values of the group that comes first
     def _collect_ext_conns(self, network: Network):
-        all = {}
-        for group in network.active_groups:
-            x = []
-            for target in group.avrg_ext_con.keys():
-                if not network.get_group_by_id(target).active:
+        groups = {group.id: group for group in network.active_groups}
+        pairs = []
+        seen = set()
+        for group in groups.values():
+            for target_id, avrg in group.avrg_ext_con.items():
+                if target_id not in groups or frozenset((group.id, target_id)) in seen:
                     continue
-                x.append((target, group.avrg_ext_con[target], group.delta_ext_con[target]))
-            all[group.id] = x
-        return all
+                seen.add(frozenset((group.id, target_id)))
+                delta = group.delta_ext_con[target_id]
+                pairs.append((group, groups[target_id], max(0, avrg - delta), avrg + delta))
+        return pairs
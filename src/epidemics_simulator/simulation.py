@@ -1,11 +1,15 @@
-import itertools
+import math
 import random
 from typing import List
 
 from src.epidemics_simulator.storage import Disease, Node, SimStats
+from src.epidemics_simulator.timing_wheel import TimingWheel
 
 
 class Simulation:
+    # infected nodes with at least this many contacts use skip sampling
+    HUB_DEGREE = 32
+
     def __init__(self, network) -> None:
         self.healthy_color = network.healthy_color
         self.cured_color = network.cured_color
@@ -13,74 +17,127 @@ class Simulation:
         self.deceased_color = network.deceased_color
         self.diseases: List[Disease] = network.diseases
         self.network = network
-        self.infected_nodes = []
-        self.unvaccinated_nodes = []
+        self.infected_nodes = set()
+        self.unvaccinated_nodes = {}  # group id -> pool of unvaccinated members
+        self.resolutions = TimingWheel()  # nodes whose infection ends at a step
+        self.immunities = TimingWheel()  # cured nodes whose immunity ends at a step
         self.current_step = 0
+        # group -> whether the members are alive, not infected and not immune, updated on
+        # every infection, resolution and end of immunity
+        self.susceptible = {}
         self.stats = SimStats(network)
 
     def simulate_step(self):
         self.current_step += 1
         self.stats.new_step()
-        for node in list(self.unvaccinated_nodes):
-            if (
-                not node.vaccinated
-                and node.group.vaccinated_amount < node.group.max_vaccination_amount
-            ):
-                r = random.uniform(0, 1)
-                if r <= node.group.vaccination_rate:
-                    node.vaccinated = True
-                    node.group.vaccinated_amount += 1
-                    self.unvaccinated_nodes.remove(node)
-                    self.stats.add_vaccination(node)
-            else:
-                self.unvaccinated_nodes.remove(node)
+        self._vaccinate()
         node: Node
-        random.shuffle(self.infected_nodes)
-        for node in self.infected_nodes.copy():
-            disease: Disease = node.infected
-            node.infected_time += 1
-            if (
-                node.infected_time >= disease.duration
-                and random.uniform(0, 1) < disease.cure_chance
-            ):
-                fatality = (
-                    disease.vaccinated_fatality_rate if node.vaccinated else disease.fatality_rate
-                )
-                if random.uniform(0, 1) <= fatality:
-                    node.alive = False
-                    self.stats.add_death(node)
-                    if not node.vaccinated:
-                        node.group.vaccinated_amount += 1
-                    continue
-                else:
-                    self.stats.add_cure(node)
-                node.infected = None
-                node.infected_time = 0
-                node.num_of_infections += 1
-                node.immunity_until_step = self.current_step + 1 + disease.immunity_period
-                self.infected_nodes.remove(node)
+        for node in self.resolutions.advance():
+            self._resolve(node)
+        for node in self.immunities.advance():
+            self.susceptible[node.group][node.index] = True
+        infected_nodes = list(self.infected_nodes)
+        random.shuffle(infected_nodes)
+        for node in infected_nodes:
+            # read from the store of the group, Node views only for new infections
+            store = node.group.store
+            disease: Disease = store.infected.item(node.index)
+            store.infected_time[node.index] += 1
+            if store.vaccinated.item(node.index):
+                infection_rate = disease.vaccinated_infection_rate
+            elif store.num_of_infections.item(node.index) > 0:
+                infection_rate = disease.reinfection_rate
+            else:
+                infection_rate = disease.infection_rate
+            infection_rate *= disease.infectiousness_factor ** store.infected_time.item(node.index)
+            groups, positions = node.group.adjacency.contacts(node.index)
+            if len(positions) >= self.HUB_DEGREE:
+                for i in self._skip_sample(len(positions), infection_rate):
+                    if self.susceptible[groups[i]][positions[i]]:
+                        self._infect(Node(groups[i], positions[i]), disease)
                 continue
-            target: Node
-            for target in itertools.chain(node.int_connections, node.ext_connections):
-                if (
-                    not target.alive
-                    or target.infected is not None
-                    or target.immunity_until_step > self.current_step
-                ):
+            for group, position in zip(groups, positions):
+                if not self.susceptible[group][position]:
                     continue
-                if node.vaccinated:
-                    infection_rate = disease.vaccinated_infection_rate
-                elif node.num_of_infections > 0:
-                    infection_rate = disease.reinfection_rate
-                else:
-                    infection_rate = disease.infection_rate
-                infection_rate *= disease.infectiousness_factor**node.infected_time
                 if random.uniform(0, 1) <= infection_rate:
-                    target.infected = disease
-                    self.infected_nodes.append(target)
-                    self.stats.add_infection(target)
+                    self._infect(Node(group, position), disease)
         self.stats.finish_step()
 
+    # yields every index of a pool of amount items independently with probability rate.
+    # The gaps between hits are geometric, so one random number is drawn per hit instead of
+    # one per item
+    def _skip_sample(self, amount: int, rate: float):
+        if rate <= 0:
+            return
+        log_miss = math.log(1 - rate) if rate < 1 else None
+        i = -1
+        while True:
+            i += 1
+            if log_miss is not None:
+                i += int(math.log(1 - random.random()) / log_miss)
+            if i >= amount:
+                return
+            yield i
+
+    def _infect(self, node: Node, disease: Disease):
+        node.infected = disease
+        if node.group in self.susceptible:
+            self.susceptible[node.group][node.index] = False
+        self.infected_nodes.add(node)
+        self.stats.add_infection(node)
+        if disease.cure_chance <= 0:
+            return
+        # an infection can end once it lasted duration steps, after that it ends
+        # with cure_chance every step, so the wait is geometric
+        wait = 1
+        if disease.cure_chance < 1:
+            wait += int(math.log(1 - random.random()) / math.log(1 - disease.cure_chance))
+        self.resolutions.schedule(self.current_step + max(disease.duration, 1) + wait - 1, node)
+
+    def _resolve(self, node: Node):
+        disease: Disease = node.infected
+        self.infected_nodes.remove(node)
+        fatality = disease.vaccinated_fatality_rate if node.vaccinated else disease.fatality_rate
+        if random.uniform(0, 1) <= fatality:
+            node.alive = False
+            self.stats.add_death(node)
+            if not node.vaccinated:
+                node.group.vaccinated_amount += 1
+            # dead nodes are no longer infectious
+            node.infected = None
+            return
+        self.stats.add_cure(node)
+        node.infected = None
+        node.infected_time = 0
+        node.num_of_infections += 1
+        node.immunity_until_step = self.current_step + 1 + disease.immunity_period
+        self.immunities.schedule(node.immunity_until_step, node)
+
+    def _vaccinate(self):
+        for group in self.network.active_groups:
+            pool = self.unvaccinated_nodes.get(group.id)
+            if not pool:
+                continue
+            remaining = group.max_vaccination_amount - group.vaccinated_amount
+            if remaining <= 0:
+                pool.clear()
+                continue
+            # every member of the pool independently with the vaccination rate, a binomial
+            # amount drawn from the random module like the rest of the simulation
+            chosen = list(self._skip_sample(len(pool), group.vaccination_rate))
+            if len(chosen) > remaining:
+                chosen = random.sample(chosen, remaining)
+            amount = len(chosen)
+            # swap remove in descending order, every swapped in node is one not chosen
+            for index in sorted(chosen, reverse=True):
+                node = pool[index]
+                pool[index] = pool[-1]
+                pool.pop()
+                node.vaccinated = True
+            group.vaccinated_amount += amount
+            if amount:
+                self.stats.group_stats[group.id].add_vaccination(amount)
+
     def create_color_seq(self):
         colors = {}
         all = []
@@ -104,24 +161,21 @@ class Simulation:
 
     def init_simulation(self):
         self.infected_nodes.clear()
+        self.resolutions.clear()
+        self.immunities.clear()
+        self.current_step = 0
+        self.susceptible = {group: [True] * group.size for group in self.network.active_groups}
         self.stats = SimStats(self.network)
         nodes = []
+        self.unvaccinated_nodes.clear()
         for group in self.network.active_groups:
             nodes.extend(group.members)
+            self.unvaccinated_nodes[group.id] = list(group.members)
             group.vaccinated_amount = 0
-        for node in nodes:
-            node.alive = True
-            node.infected = None
-            node.infected_time = 0
-            node.num_of_infections = 0
-            node.vaccinated = False
-        self.unvaccinated_nodes = nodes.copy()
+            group.store.reset_state()
         for disease in self.diseases:
             random.shuffle(nodes)
-            infected = nodes[: disease.initial_infection_count]
-            for node in infected:
-                node.infected = disease
-                self.stats.add_infection(node)
-            self.infected_nodes.extend(infected)
+            for node in nodes[: disease.initial_infection_count]:
+                self._infect(node, disease)
             nodes = nodes[disease.initial_infection_count :]
         self.stats.finish_step()
@@ -1,4 +1,5 @@
-from .networks import Network, NodeGroup, Node
+from .networks import Network, NodeGroup, Node, NodeStore, CompiledNetwork, SharedNetwork
 from .disease import Disease
 from .project import Project
+from .network_cache import NetworkCache
 from .sim_stats import SimStats
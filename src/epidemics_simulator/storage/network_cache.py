@@ -0,0 +1,87 @@
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from .networks import Network
+
+
+# Directory of built connections, addressed by a hash of the parameters of the network and
+# the seed they were built with. Switching between a few configurations, e.g. by toggling
+# groups or switching templates, loads the connections instead of building them again.
+# Least recently used files are removed once the directory grows beyond max_bytes.
+class NetworkCache:
+    DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "epidemics_simulator")
+    DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+    def __init__(self, directory: str = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory or NetworkCache.DEFAULT_DIRECTORY
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, network: Network, seed=None) -> str:
+        data = f"{network.parameter_hash()}/{seed}"
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def path(self, network: Network, seed=None) -> str:
+        return os.path.join(self.directory, self.key(network, seed) + ".npz")
+
+    # attaches cached connections, returns False if there are none for the network
+    def load(self, network: Network, seed=None) -> bool:
+        path = self.path(network, seed)
+        try:
+            with np.load(path) as data:
+                network.set_edge_arrays({name: data[name] for name in data.files})
+        except (FileNotFoundError, OSError, ValueError):
+            return False
+        os.utime(path)  # most recently used
+        network.built_hash = network.parameter_hash()
+        network.builder.mark_built()
+        return True
+
+    def store(self, network: Network, seed=None) -> None:
+        if not network.is_built:
+            return
+        # written to a temporary file first, so readers never see half a file, evict skips
+        # the temporary files other processes are still writing
+        handle, temporary = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        with os.fdopen(handle, "wb") as f:
+            np.savez_compressed(f, **network.edge_arrays())
+        os.replace(temporary, self.path(network, seed))
+        self.evict()
+
+    # loads the connections from the cache or builds and caches them, returns False if they
+    # had to be built. Connections that are already built, e.g. loaded from graph.npz, are kept.
+    def build(self, network: Network, workers: int = 1, seed=None, incremental=False) -> bool:
+        if network.is_built or self.load(network, seed):
+            return True
+        network.build(workers, seed, incremental)
+        self.store(network, seed)
+        return False
+
+    # removes the least recently used files until the cache fits into max_bytes
+    def evict(self) -> None:
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npz"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
@@ -1,3 +1,6 @@
 from .network import Network
 from .node_group import NodeGroup
 from .node import Node
+from .node_store import NodeStore
+from .compiled_network import CompiledNetwork
+from .shared_network import SharedNetwork, SharedNetworkHandle
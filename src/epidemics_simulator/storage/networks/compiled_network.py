@@ -0,0 +1,96 @@
+import numpy as np
+
+
+# Flat integer view of a built network. Nodes of the active groups get contiguous
+# indices in group order, the graph is stored in csr layout: the neighbours of node i
+# are indices[indptr[i] : indptr[i + 1]] and edge_internal marks which of them lie in
+# the same group. Every undirected edge appears once in each direction.
+class CompiledNetwork:
+    def __init__(self, network) -> None:
+        groups = network.active_groups
+        self.group_ids = [group.id for group in groups]
+        self.group_sizes = np.array([group.size for group in groups], dtype=np.int64)
+        self.group_offsets = np.zeros(len(groups) + 1, dtype=np.int64)
+        self.group_offsets[1:] = np.cumsum(self.group_sizes)
+        self.refresh(network)
+        self.node_group = np.repeat(np.arange(len(groups), dtype=np.int32), self.group_sizes)
+
+        # both directions of every edge as (node, neighbour, internal), connections into
+        # inactive groups are left over from older builds
+        nodes, neighbours, internal = [], [], []
+        offsets = {group.id: int(offset) for group, offset in zip(groups, self.group_offsets)}
+        for group in groups:
+            offset = offsets[group.id]
+            sources, targets = group.store.internal_edges()
+            nodes += [sources + offset, targets + offset]
+            neighbours += [targets + offset, sources + offset]
+            internal += [np.ones(2 * len(sources), dtype=bool)]
+            for target_id in group.store.ext_sources:
+                if target_id not in offsets:
+                    continue
+                sources, targets = group.store.external_edges(target_id)
+                nodes += [sources + offset, targets + offsets[target_id]]
+                neighbours += [targets + offsets[target_id], sources + offset]
+                internal += [np.zeros(2 * len(sources), dtype=bool)]
+        nodes = np.concatenate(nodes or [np.zeros(0, dtype=np.int32)])
+        neighbours = np.concatenate(neighbours or [np.zeros(0, dtype=np.int32)])
+        internal = np.concatenate(internal or [np.zeros(0, dtype=bool)])
+        # internal neighbours first, each part in the order the edges were added
+        order = np.lexsort((~internal, nodes))
+        self.indptr = np.zeros(self.size + 1, dtype=np.int32)
+        self.indptr[1:] = np.cumsum(np.bincount(nodes, minlength=self.size))
+        self.indices = neighbours[order].astype(np.int32)
+        self.edge_internal = internal[order]
+
+    # copies the attributes that can change without rebuilding the connections
+    def refresh(self, network) -> None:
+        groups = network.active_groups
+        self.name = network.name
+        self.healthy_color = network.healthy_color
+        self.cured_color = network.cured_color
+        self.vaccinated_color = network.vaccinated_color
+        self.deceased_color = network.deceased_color
+        self.diseases = list(network.diseases)
+        self.group_names = [group.name for group in groups]
+        self.group_colors = [group.color for group in groups]
+        self.vaccination_rate = np.array([g.vaccination_rate for g in groups], dtype=np.float64)
+        self.max_vaccination_amount = np.array(
+            [g.max_vaccination_amount for g in groups], dtype=np.int64
+        )
+
+    @property
+    def size(self) -> int:
+        return int(self.group_offsets[-1])
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices) // 2
+
+    @property
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    # False if groups were toggled or resized since compiling
+    def matches(self, network) -> bool:
+        groups = network.active_groups
+        if self.group_ids != [group.id for group in groups]:
+            return False
+        return self.group_sizes.tolist() == [group.size for group in groups]
+
+    def group_index(self, group_id: str) -> int:
+        return self.group_ids.index(group_id)
+
+    def group_slice(self, group_id: str) -> slice:
+        i = self.group_index(group_id)
+        return slice(int(self.group_offsets[i]), int(self.group_offsets[i + 1]))
+
+    # node ids are "{group id}-{position in group}"
+    def node_index(self, node_id: str) -> int:
+        group_id, position = node_id.split("-")
+        return int(self.group_offsets[self.group_index(group_id)]) + int(position)
+
+    # returns every undirected edge once as (from, to) index arrays with from < to
+    def edge_list(self):
+        sources = np.repeat(np.arange(self.size, dtype=np.int32), self.degrees)
+        mask = sources < self.indices
+        return sources[mask], self.indices[mask], self.edge_internal[mask]
@@ -1,7 +1,16 @@
+import hashlib
+import json
 from typing import List
 
+import numpy as np
+
 
 class Network:
+    # how NetworkBuilder creates the connections between groups, pairwise runs a generator
+    # for every connected pair of groups, stochastic_block_model samples all of them at once
+    PAIRWISE = "pairwise"
+    STOCHASTIC_BLOCK_MODEL = "stochastic_block_model"
+
     def __init__(self) -> None:
         from src.epidemics_simulator.network_builder import NetworkBuilder
 
@@ -9,7 +18,13 @@ class Network:
         self.group_id_counter: int = 0
         self.diseases = []
         self.groups = []
+        # id -> object, kept in sync by the methods below
+        self._diseases_by_id = {}
+        self._groups_by_id = {}
         self.builder = NetworkBuilder(self)
+        self._compiled = None
+        self.built_hash = None  # parameter_hash() when the connections were created
+        self.external_generator = Network.PAIRWISE
         self.healthy_color = "rgb(0.043, 0.388, 0.082)"
         self.cured_color = "rgb(0.192, 0.961, 0.573)"
         self.vaccinated_color = "rgb(0.067, 0, 0.941)"
@@ -23,44 +38,120 @@ class Network:
         if disease in self.diseases:
             return False
         self.diseases.append(disease)
+        self._diseases_by_id[disease.id] = disease
         return True
 
     def remove_disease(self, disease_id) -> bool:
-        for disease in self.diseases:
-            if disease.id == disease_id:
-                self.diseases.remove(disease)
-                return True
-        return False
+        if (disease := self._diseases_by_id.pop(disease_id, None)) is None:
+            return False
+        self.diseases.remove(disease)
+        return True
 
     def add_group(self, group) -> bool:
         if group in self.groups:
             return False
         self.groups.append(group)
+        self._groups_by_id[group.id] = group
         return True
 
     def delete_group(self, group_id: str) -> bool:
-        ret = any(g.id == group_id for g in self.groups)
+        ret = self._groups_by_id.pop(group_id, None) is not None
         self.groups = [group for group in self.groups if group.id != group_id]
         for group in self.groups:
+            # connections to the deleted group disappear from the members
+            group.reset_adjacency()
             if group_id in group.avrg_ext_con:
                 del group.avrg_ext_con[group_id]
                 del group.delta_ext_con[group_id]
         return ret
 
     def get_group_by_id(self, id: str):
-        for group in self.groups:
-            if group.id == id:
-                return group
-        return None
+        return self._groups_by_id.get(id)
 
     def get_disease_by_id(self, id: str):
-        for disease in self.diseases:
-            if disease.id == id:
-                return disease
-        return None
+        return self._diseases_by_id.get(id)
+
+    # rebuilds the id indexes after groups or diseases were assigned directly
+    def reindex(self):
+        self._groups_by_id = {group.id: group for group in self.groups}
+        self._diseases_by_id = {disease.id: disease for disease in self.diseases}
+
+    def build(self, workers: int = 1, seed=None, incremental: bool = False):
+        self.builder.build(workers, seed, incremental)
+        self.built_hash = self.parameter_hash()
+
+    # builds only if the parameters changed since the connections were created or loaded
+    def ensure_built(self, workers: int = 1, seed=None) -> bool:
+        if self.is_built:
+            return False
+        self.build(workers, seed)
+        return True
+
+    @property
+    def is_built(self) -> bool:
+        return self.built_hash is not None and self.built_hash == self.parameter_hash()
+
+    # hash of everything the builder creates the connections from, inactive groups and
+    # their connections are left out since they are not built
+    def parameter_hash(self) -> str:
+        active = {g.id for g in self.active_groups}
+        groups = [
+            [
+                g.id,
+                g.size,
+                g.avrg_int_con,
+                g.delta_int_con,
+                g.generator,
+                {id: x for id, x in g.avrg_ext_con.items() if id in active},
+                {id: x for id, x in g.delta_ext_con.items() if id in active},
+            ]
+            for g in self.active_groups
+        ]
+        data = json.dumps([self.external_generator, groups], sort_keys=True)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    # int32 position arrays of all connections of the active groups, see NodeStore
+    def edge_arrays(self) -> dict:
+        arrays = {}
+        active = {group.id for group in self.active_groups}
+        for group in self.active_groups:
+            arrays[f"int_{group.id}"] = np.stack(group.store.internal_edges())
+            for target_id in group.store.ext_sources:
+                if target_id not in active:
+                    continue
+                arrays[f"ext_{group.id}_{target_id}"] = np.stack(
+                    group.store.external_edges(target_id)
+                )
+        return arrays
+
+    # replaces all connections with the arrays of edge_arrays()
+    def set_edge_arrays(self, arrays: dict):
+        for group in self.groups:
+            group.store.clear_edges()
+        for name, edges in arrays.items():
+            kind, group_id, *target_id = name.split("_")
+            if (group := self.get_group_by_id(group_id)) is None:
+                continue
+            if kind == "int":
+                group.store.add_internal_edges(edges[0], edges[1])
+            elif (target := self.get_group_by_id(target_id[0])) is not None:
+                group.store.add_external_edges(target.id, edges[0], edges[1])
+        for group in self.groups:
+            group.reset_adjacency()
+        self.reset_compiled()
+
+    # flat csr view of the built network, the connections are cached until they change
+    def compile(self):
+        from src.epidemics_simulator.storage import CompiledNetwork
+
+        if self._compiled is None or not self._compiled.matches(self):
+            self._compiled = CompiledNetwork(self)
+        else:
+            self._compiled.refresh(self)
+        return self._compiled
 
-    def build(self):
-        self.builder.build()
+    def reset_compiled(self):
+        self._compiled = None
 
     def to_dict(self):
         return {
@@ -68,6 +159,7 @@ class Network:
             "group_id_counter": self.group_id_counter,
             "diseases": [x.to_dict() for x in self.diseases],
             "groups": [g.to_dict() for g in self.groups],
+            "external_generator": self.external_generator,
             "healthy_color": self.healthy_color,
             "cured_color": self.cured_color,
             "vaccinated_color": self.vaccinated_color,
@@ -85,11 +177,13 @@ class Network:
         diseases = data.get("diseases", [])
         instance.diseases = [Disease.from_dict(disease) for disease in diseases]
         instance.groups = [NodeGroup.from_dict(group, instance) for group in data.get("groups", [])]
+        instance.external_generator = data.get("external_generator", Network.PAIRWISE)
         instance.healthy_color = data.get("healthy_color", "rgb(0.043, 0.388, 0.082)")
         instance.cured_color = data.get("cured_color", "rgb(0.192, 0.961, 0.573)")
         instance.vaccinated_color = data.get("vaccinated_color", "rgb(0.067, 0, 0.941)")
         instance.deceased_color = data.get("deceased_color", "rgb(0.012, 0.012, 0.012)")
         instance.builder = NetworkBuilder(instance)
+        instance.reindex()
         return instance
 
     def set_healthy_color(self, value):
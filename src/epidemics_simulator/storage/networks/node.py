@@ -1,24 +1,53 @@
 from typing import List
 
 
+# property reading and writing one field of the NodeStore of the group of a node
+def _state(name: str) -> property:
+    def get(node: "Node"):
+        return node.group.store.__dict__[name].item(node.index)
+
+    def set(node: "Node", value) -> None:
+        getattr(node.group.store, name)[node.index] = value
+
+    return property(get, set)
+
+
+# View on one member of a NodeGroup, the state and the connections live in the NodeStore
+# of the group. Views are created on access, two views on the same member are equal.
 class Node:
-    # Class variable to store instances
-    all_instances_by_id: dict[str, "Node"] = {}
+    __slots__ = ("group", "index")
 
-    def __init__(self, group):
-        self.id: str = f"{group.id}-{group.node_id_counter}"  # auto set new id
-        group.node_id_counter += 1
+    def __init__(self, group, index: int):
         self.group = group
-        self.int_connections: List["Node"] = []  # node ids this node is connected to
-        self.ext_connections: List["Node"] = []  # node ids this node is connected to
-        self.infected_time: int = 0
-        self.infected = None
-        self.num_of_infections: int = 0
-        self.vaccinated: bool = False
-        self.alive: bool = True
-        self.immunity_until_step = 0
-        # other properties, e.g. infected, was infected x times, etc.
-        Node.all_instances_by_id[self.id] = self
+        self.index = index
+
+    infected_time: int = _state("infected_time")
+    infected = _state("infected")
+    num_of_infections: int = _state("num_of_infections")
+    vaccinated: bool = _state("vaccinated")
+    alive: bool = _state("alive")
+    immunity_until_step: int = _state("immunity_until_step")
+
+    @property
+    def id(self) -> str:
+        return f"{self.group.id}-{self.index}"
+
+    @property
+    def int_connections(self) -> List["Node"]:
+        group = self.group
+        indptr, indices = group.adjacency.internal
+        start, end = indptr.item(self.index), indptr.item(self.index + 1)
+        return [Node(group, i) for i in indices[start:end].tolist()]
+
+    @property
+    def ext_connections(self) -> List["Node"]:
+        adjacency = self.group.adjacency
+        indptr, groups, indices = adjacency.external
+        start, end = indptr.item(self.index), indptr.item(self.index + 1)
+        return [
+            Node(adjacency.groups[g], i)
+            for g, i in zip(groups[start:end].tolist(), indices[start:end].tolist())
+        ]
 
     @property
     def siblings(self) -> List["Node"]:
@@ -27,11 +56,13 @@ class Node:
 
     @property
     def int_conn_amount(self) -> int:
-        return len(self.int_connections)
+        indptr = self.group.adjacency.internal[0]
+        return int(indptr[self.index + 1] - indptr[self.index])
 
     def get_ext_conn_amount(self, to_group: str = None) -> int:
         if to_group is None:
-            return len(self.ext_connections)
+            indptr = self.group.adjacency.external[0]
+            return int(indptr[self.index + 1] - indptr[self.index])
         else:
             return len([i for i in self.ext_connections if to_group in i.id.split("-")[0]])
 
@@ -40,9 +71,7 @@ class Node:
             raise KeyError
         if target in self.int_connections:
             return False
-        self.int_connections.append(target)
-        target.int_connections.append(self)
-        self.group.add_internal_edge(self.id, target_id)
+        self.connect_internal(target)
         return True
 
     def add_ext_connection(self, target_id: str) -> bool:
@@ -51,20 +80,28 @@ class Node:
             raise KeyError
         if target in self.ext_connections:
             return False
-        self.ext_connections.append(target)
-        target.ext_connections.append(self)
-        self.group.add_external_edge(self.id, target_id)
+        self.connect_external(target)
         return True
 
+    # connects without looking up the target or checking for an existing connection,
+    # for generators that already produce unique edges
+    def connect_internal(self, target: "Node") -> None:
+        self.group.add_internal_edges([self.index], [target.index])
+
+    def connect_external(self, target: "Node") -> None:
+        self.group.add_external_edges(target.group, [self.index], [target.index])
+
     def has_connection(self, target_id: str) -> bool:
         for node in [self.int_connections, self.ext_connections]:
             if node.id == target_id:
                 return True
         return False
 
-    def clear_connections(self) -> None:
-        self.int_connections.clear()
-        self.ext_connections.clear()
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Node) and self.group is other.group and self.index == other.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.group), self.index))
 
     def __str__(self):
         tmp = f"ID: {self.id}, Connections: ["
@@ -81,6 +118,4 @@ class Node:
 
     @classmethod
     def from_dict(cls, data, group):
-        instance = cls(group=group)
-        instance.id = data["id"]
-        return instance
+        return cls(group, int(data["id"].split("-")[1]))
@@ -1,14 +1,146 @@
 import math
 import random
 import statistics
+from collections.abc import Sequence, Set
 from typing import List, Optional
 
+import numpy as np
+
 from .network import Network
 from .node import Node
+from .node_store import NodeStore
+
+
+# list like view on the members of a group, the Node objects are created on access
+class Members(Sequence):
+    def __init__(self, group: "NodeGroup") -> None:
+        self.group = group
+
+    def __len__(self) -> int:
+        return self.group.store.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Node(self.group, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("member index out of range")
+        return Node(self.group, index)
+
+    # members of several groups can be joined like lists
+    def __add__(self, other) -> List[Node]:
+        return list(self) + list(other)
+
+    def __radd__(self, other) -> List[Node]:
+        return list(other) + list(self)
+
+
+# set like view on edges of a group as "{from id}/{to id}" strings, generated from the
+# positions in the NodeStore on access. to_group is None for the internal edges.
+class EdgeView(Set):
+    def __init__(self, group: "NodeGroup", to_group: str = None) -> None:
+        self.group = group
+        self.to_group = to_group
+
+    def _edges(self):
+        if self.to_group is None:
+            return self.group.store.internal_edges()
+        return self.group.store.external_edges(self.to_group)
+
+    def __len__(self) -> int:
+        store = self.group.store
+        if self.to_group is None:
+            return len(store.int_sources)
+        return len(store.ext_sources.get(self.to_group, ()))
+
+    def __iter__(self):
+        to_group = self.group.id if self.to_group is None else self.to_group
+        sources, targets = self._edges()
+        for source, target in zip(sources.tolist(), targets.tolist()):
+            yield f"{self.group.id}-{source}/{to_group}-{target}"
+
+    def __contains__(self, edge) -> bool:
+        to_group = self.group.id if self.to_group is None else self.to_group
+        try:
+            _from, to = edge.split("/")
+            from_id, source = _from.rsplit("-", 1)
+            to_id, target = to.rsplit("-", 1)
+            source, target = int(source), int(target)
+        except (AttributeError, ValueError):
+            return False
+        if from_id != self.group.id or to_id != to_group:
+            return False
+        sources, targets = self._edges()
+        return bool(((sources == source) & (targets == target)).any())
+
+    # results of set operations are plain sets
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return set(iterable)
+
+
+# csr layout of the connections of all members of a group. The internal neighbours of
+# member i are internal[1][internal[0][i] : internal[0][i + 1]], the external ones are
+# pairs of an index into groups and a position in that group.
+class Adjacency:
+    def __init__(self, group: "NodeGroup") -> None:
+        self.group = group
+        size = group.size
+        sources, targets = group.store.internal_edges()
+        self.internal = Adjacency._csr(
+            size, np.concatenate((sources, targets)), [np.concatenate((targets, sources))]
+        )
+        self.groups = []
+        nodes, group_indices, positions = [], [], []
+        # edges this group created and edges other groups created to it, inactive groups
+        # keep the connections of older builds
+        for other in group.network.active_groups:
+            if other is group:
+                continue
+            outgoing = group.store.external_edges(other.id)
+            incoming = other.store.external_edges(group.id)
+            sources = np.concatenate((outgoing[0], incoming[1]))
+            targets = np.concatenate((outgoing[1], incoming[0]))
+            if not len(sources):
+                continue
+            nodes.append(sources)
+            group_indices.append(np.full(len(sources), len(self.groups), dtype=np.int32))
+            positions.append(targets)
+            self.groups.append(other)
+        self.external = Adjacency._csr(
+            size,
+            np.concatenate(nodes or [np.zeros(0, dtype=np.int32)]),
+            [
+                np.concatenate(group_indices or [np.zeros(0, dtype=np.int32)]),
+                np.concatenate(positions or [np.zeros(0, dtype=np.int32)]),
+            ],
+        )
+
+    # groups and positions of all connections of the member at position, internal ones first
+    def contacts(self, position: int):
+        indptr, indices = self.internal
+        start, end = indptr.item(position), indptr.item(position + 1)
+        groups = [self.group] * (end - start)
+        positions = indices[start:end].tolist()
+        indptr, group_indices, indices = self.external
+        start, end = indptr.item(position), indptr.item(position + 1)
+        groups += [self.groups[g] for g in group_indices[start:end].tolist()]
+        positions += indices[start:end].tolist()
+        return groups, positions
+
+    # indptr followed by the values sorted by node, in the order they were added
+    def _csr(size: int, nodes: np.ndarray, values: List[np.ndarray]):
+        order = np.argsort(nodes, kind="stable")
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(nodes, minlength=size))
+        return (indptr, *[v[order] for v in values])
 
 
 class NodeGroup:
-    all_instances_by_id: dict[str, "NodeGroup"] = {}
+    # generators NetworkBuilder can build the connections of a group with
+    HAVEL_HAKIMI = "havel_hakimi"
+    CONFIGURATION_MODEL = "configuration_model"
 
     def __init__(
         self,
@@ -34,7 +166,9 @@ class NodeGroup:
             self.id = id
         self.node_id_counter: int = 0
         # spawn members for size
-        self.members: List["Node"] = []
+        self.store = NodeStore()
+        self.members = Members(self)
+        self._adjacency = None
         self.create_members(size)
         self.avrg_int_con: int = aic
         self.delta_int_con: int = dic
@@ -47,21 +181,43 @@ class NodeGroup:
         self.vaccinated_amount = 0
         self.color: str = color
         self.active: bool = True
-        self.internal_edges = set()
-        self.external_edges = {}
+        self.generator: str = NodeGroup.HAVEL_HAKIMI
 
     @property
     def size(self) -> int:
-        return len(self.members)
+        return self.store.size
+
+    @property
+    def internal_edges(self) -> EdgeView:
+        return EdgeView(self)
+
+    # id of the target group -> edges this group created to it
+    @property
+    def external_edges(self) -> dict[str, EdgeView]:
+        return {id: EdgeView(self, id) for id in self.store.ext_sources}
+
+    # connections of the members, rebuilt after connections changed
+    @property
+    def adjacency(self) -> Adjacency:
+        if self._adjacency is None:
+            self._adjacency = Adjacency(self)
+        return self._adjacency
+
+    def reset_adjacency(self) -> None:
+        self._adjacency = None
 
-    def add_internal_edge(self, _from: str, to: str):
-        self.internal_edges.add(f"{_from}/{to}")
+    # connects the members at the positions sources[i] and targets[i]
+    def add_internal_edges(self, sources, targets) -> None:
+        self.store.add_internal_edges(sources, targets)
+        self.reset_adjacency()
+        self.network.reset_compiled()
 
-    def add_external_edge(self, _from: str, to: str):
-        to_group = to.split("-")[0]
-        if to_group not in self.external_edges:
-            self.external_edges[to_group] = set()
-        self.external_edges[to_group].add(f"{_from}/{to}")
+    # connects members of this group at sources[i] with members of target at targets[i]
+    def add_external_edges(self, target: "NodeGroup", sources, targets) -> None:
+        self.store.add_external_edges(target.id, sources, targets)
+        self.reset_adjacency()
+        target.reset_adjacency()
+        self.network.reset_compiled()
 
     def add_external_connection(self, target_group_id: str, ac: int, dc: int) -> bool:
         # if dc > ac:
@@ -84,26 +240,39 @@ class NodeGroup:
             return False
         del self.avrg_ext_con[target_group_id]
         del self.delta_ext_con[target_group_id]
-        del target.avrg_ext_con[target_group_id]
-        del target.delta_ext_con[target_group_id]
+        del target.avrg_ext_con[self.id]
+        del target.delta_ext_con[self.id]
         return True
 
     def create_members(self, amount: int) -> None:
-        for _ in range(0, amount):
-            self.members.append(Node(self))
+        self.store.grow(amount)
+        self.node_id_counter += amount
+
+    def clear_internal_connections(self) -> None:
+        self.store.clear_internal_edges()
+        self.reset_adjacency()
+        self.network.reset_compiled()
+
+    # removes the connections this group created to target
+    def remove_external_connections(self, target: "NodeGroup") -> None:
+        self.store.drop_external(target.id)
+        self.reset_adjacency()
+        target.reset_adjacency()
+        self.network.reset_compiled()
 
     def clear_connections(self) -> None:
-        self.internal_edges.clear()
-        self.external_edges.clear()
-        # clear all connections in members
-        for member in self.members:
-            member.clear_connections()
+        self.store.clear_edges()
+        for group in self.network.groups:
+            group.reset_adjacency()
+        self.reset_adjacency()
+        self.network.reset_compiled()
 
+    # node ids are "{group id}-{position in group}"
     def get_member(self, node_id: str) -> Optional[Node]:
-        for member in self.members:
-            if member.id == node_id:
-                return member
-        return None
+        group_id, _, position = node_id.rpartition("-")
+        if group_id != self.id or not position.isdigit() or int(position) >= self.size:
+            return None
+        return Node(self, int(position))
 
     def get_properties_dict(self):
         return {
@@ -144,7 +313,11 @@ class NodeGroup:
             raise ValueError("Delta has to be smalller then average")
         self.name = name
         if member_count != self.size:
-            self.members.clear()
+            self.clear_connections()
+            # the positions other groups connected to are gone
+            for group in self.network.groups:
+                group.store.drop_external(self.id)
+            self.store = NodeStore()
             self.node_id_counter = 0
             self.create_members(member_count)
         self.age = age
@@ -181,7 +354,7 @@ class NodeGroup:
         return {
             "name": self.name,
             "id": self.id,
-            "size": len(self.members),
+            "size": self.size,
             "node_id_counter": self.node_id_counter,
             "avrg_int_con": self.avrg_int_con,
             "delta_int_con": self.delta_int_con,
@@ -194,6 +367,7 @@ class NodeGroup:
             "vaccinated_amount": self.vaccinated_amount,
             "color": self.color,
             "active": self.active,
+            "generator": self.generator,
         }
 
     @classmethod
@@ -221,4 +395,5 @@ class NodeGroup:
         instance.vaccinated_amount = data["vaccinated_amount"]
         instance.color = data["color"]
         instance.active = data["active"]
+        instance.generator = data.get("generator", NodeGroup.HAVEL_HAKIMI)
         return instance
@@ -0,0 +1,96 @@
+from array import array
+
+import numpy as np
+
+
+# Struct of arrays holding the state and the connections of the members of one NodeGroup.
+# Members are addressed by their position in the group, Node objects are only views on a
+# position. Connections are pairs of int32 positions, internal ones in int_sources and
+# int_targets, external ones in ext_sources and ext_targets by the id of the target group.
+# Every edge is stored once, in the store of the group it was created from.
+class NodeStore:
+    def __init__(self, size: int = 0) -> None:
+        self.size = 0
+        self.alive = np.ones(0, dtype=bool)
+        self.vaccinated = np.zeros(0, dtype=bool)
+        self.infected = np.full(0, None, dtype=object)  # disease or None
+        self.infected_time = np.zeros(0, dtype=np.int32)
+        self.num_of_infections = np.zeros(0, dtype=np.int32)
+        self.immunity_until_step = np.zeros(0, dtype=np.int64)
+        self.int_sources = array("i")
+        self.int_targets = array("i")
+        self.ext_sources: dict[str, array] = {}
+        self.ext_targets: dict[str, array] = {}
+        self.grow(size)
+
+    # appends amount members with the default state
+    def grow(self, amount: int) -> None:
+        self.size += amount
+        self.alive = np.concatenate((self.alive, np.ones(amount, dtype=bool)))
+        self.vaccinated = np.concatenate((self.vaccinated, np.zeros(amount, dtype=bool)))
+        self.infected = np.concatenate((self.infected, np.full(amount, None, dtype=object)))
+        self.infected_time = np.concatenate((self.infected_time, np.zeros(amount, dtype=np.int32)))
+        self.num_of_infections = np.concatenate(
+            (self.num_of_infections, np.zeros(amount, dtype=np.int32))
+        )
+        self.immunity_until_step = np.concatenate(
+            (self.immunity_until_step, np.zeros(amount, dtype=np.int64))
+        )
+
+    def reset_state(self) -> None:
+        self.alive[:] = True
+        self.vaccinated[:] = False
+        self.infected[:] = None
+        self.infected_time[:] = 0
+        self.num_of_infections[:] = 0
+        self.immunity_until_step[:] = 0
+
+    def add_internal_edges(self, sources, targets) -> None:
+        self.int_sources.frombytes(np.asarray(sources, dtype=np.int32).tobytes())
+        self.int_targets.frombytes(np.asarray(targets, dtype=np.int32).tobytes())
+
+    def add_external_edges(self, group_id: str, sources, targets) -> None:
+        sources = np.asarray(sources, dtype=np.int32).tobytes()
+        targets = np.asarray(targets, dtype=np.int32).tobytes()
+        self.ext_sources.setdefault(group_id, array("i")).frombytes(sources)
+        self.ext_targets.setdefault(group_id, array("i")).frombytes(targets)
+
+    # copies, numpy views would keep the arrays from growing
+    def internal_edges(self):
+        sources = np.array(self.int_sources, dtype=np.int32)
+        return sources, np.array(self.int_targets, dtype=np.int32)
+
+    def external_edges(self, group_id: str):
+        if group_id not in self.ext_sources:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+        return (
+            np.array(self.ext_sources[group_id], dtype=np.int32),
+            np.array(self.ext_targets[group_id], dtype=np.int32),
+        )
+
+    def drop_external(self, group_id: str) -> None:
+        self.ext_sources.pop(group_id, None)
+        self.ext_targets.pop(group_id, None)
+
+    def clear_internal_edges(self) -> None:
+        self.int_sources = array("i")
+        self.int_targets = array("i")
+
+    def clear_edges(self) -> None:
+        self.clear_internal_edges()
+        self.ext_sources.clear()
+        self.ext_targets.clear()
+
+    @property
+    def nbytes(self) -> int:
+        states = [
+            self.alive,
+            self.vaccinated,
+            self.infected,
+            self.infected_time,
+            self.num_of_infections,
+            self.immunity_until_step,
+        ]
+        edges = [self.int_sources, self.int_targets]
+        edges += list(self.ext_sources.values()) + list(self.ext_targets.values())
+        return sum(x.nbytes for x in states) + sum(len(x) * x.itemsize for x in edges)
@@ -0,0 +1,89 @@
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .compiled_network import CompiledNetwork
+
+
+# Publishes the arrays of a CompiledNetwork once through multiprocessing.shared_memory.
+# Only the small handle gets pickled into worker processes, they attach to the segments
+# read only without copying. The segments are unlinked on close(), when leaving the
+# with block or at the latest when the interpreter exits.
+class SharedNetwork:
+    ARRAYS = [
+        "group_sizes",
+        "group_offsets",
+        "vaccination_rate",
+        "max_vaccination_amount",
+        "node_group",
+        "indptr",
+        "indices",
+        "edge_internal",
+    ]
+
+    def __init__(self, compiled: CompiledNetwork) -> None:
+        self.segments = []
+        arrays = {}
+        for name in self.ARRAYS:
+            array = getattr(compiled, name)
+            # segments can't be empty
+            segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[:] = array
+            self.segments.append(segment)
+            arrays[name] = (segment.name, array.shape, array.dtype.str)
+        self.handle = SharedNetworkHandle(compiled, arrays)
+        self._finalizer = weakref.finalize(self, SharedNetwork._release, self.segments)
+
+    def _release(segments):
+        for segment in segments:
+            segment.close()
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class SharedNetworkHandle:
+    def __init__(self, compiled: CompiledNetwork, arrays: dict) -> None:
+        self.arrays = arrays
+        self.name = compiled.name
+        self.healthy_color = compiled.healthy_color
+        self.cured_color = compiled.cured_color
+        self.vaccinated_color = compiled.vaccinated_color
+        self.deceased_color = compiled.deceased_color
+        self.diseases = compiled.diseases
+        self.group_ids = compiled.group_ids
+        self.group_names = compiled.group_names
+        self.group_colors = compiled.group_colors
+
+    # returns a CompiledNetwork whose arrays are read only views on the shared segments
+    def attach(self) -> CompiledNetwork:
+        compiled = CompiledNetwork.__new__(CompiledNetwork)
+        compiled.name = self.name
+        compiled.healthy_color = self.healthy_color
+        compiled.cured_color = self.cured_color
+        compiled.vaccinated_color = self.vaccinated_color
+        compiled.deceased_color = self.deceased_color
+        compiled.diseases = self.diseases
+        compiled.group_ids = self.group_ids
+        compiled.group_names = self.group_names
+        compiled.group_colors = self.group_colors
+        # keep the segments referenced as long as the views are in use
+        compiled.shared_segments = []
+        for name, (segment_name, shape, dtype) in self.arrays.items():
+            segment = shared_memory.SharedMemory(name=segment_name)
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+            array.flags.writeable = False
+            setattr(compiled, name, array)
+            compiled.shared_segments.append(segment)
+        return compiled
@@ -1,11 +1,22 @@
 from src.epidemics_simulator.storage import Network
+import io
 import json
 import os
+import struct
+import zlib
+
+import numpy as np
 
 
 class Project:
     NETWORK_FILE_NAME = "network.json"
+    # connections of the built network with the parameter hash they were built from
+    GRAPH_FILE_NAME = "graph.npz"
     STAT_FILE_FOLDER = "stats"
+    PAYLOAD_MAGIC = b"EPSP"
+    PAYLOAD_VERSION = 1
+    PAYLOAD_HEADER = struct.Struct(">4sHI")
+    PAYLOAD_CONTENT_TYPE = "application/vnd.epidemics-simulator.project"
 
     def __init__(self, file_location) -> None:
         self.network: Network = None
@@ -28,6 +39,10 @@ class Project:
     def network_file_location(self):
         return os.path.join(self.file_location, self.NETWORK_FILE_NAME)
 
+    @property
+    def graph_file_location(self):
+        return os.path.join(self.file_location, self.GRAPH_FILE_NAME)
+
     @property
     def stat_file_location(self):
         return os.path.join(self.file_location, self.STAT_FILE_FOLDER)
@@ -46,6 +61,73 @@ class Project:
     def save_to_file(self):
         with open(self.network_file_location, "w", encoding="utf-8") as f:
             json.dump(self.to_dict(), f, ensure_ascii=False, indent=4)
+        self.save_graph()
+
+    # stores the connections next to the network file if they match the parameters
+    def save_graph(self):
+        if not self.network or not self.network.is_built:
+            if os.path.exists(self.graph_file_location):
+                os.remove(self.graph_file_location)
+            return
+        np.savez_compressed(
+            self.graph_file_location,
+            parameter_hash=np.array(self.network.built_hash),
+            **self.network.edge_arrays(),
+        )
+
+    # attaches the stored connections, returns False if there are none for the parameters
+    def load_graph(self) -> bool:
+        if not self.network or not os.path.exists(self.graph_file_location):
+            return False
+        with np.load(self.graph_file_location) as data:
+            return self._attach_graph(data)
+
+    def _attach_graph(self, data) -> bool:
+        if str(data["parameter_hash"]) != self.network.parameter_hash():
+            return False
+        self.network.set_edge_arrays(
+            {name: data[name] for name in data.files if name != "parameter_hash"}
+        )
+        self.network.built_hash = self.network.parameter_hash()
+        self.network.builder.mark_built()
+        return True
+
+    # binary form for pushing the project to the Dash server: magic, version and length of
+    # the zlib compressed json of to_dict(), followed by the connections as in save_graph
+    def to_bytes(self, include_edges: bool = False) -> bytes:
+        parameters = zlib.compress(json.dumps(self.to_dict()).encode("utf-8"))
+        edges = b""
+        if include_edges and self.network and self.network.is_built:
+            buffer = io.BytesIO()
+            np.savez_compressed(
+                buffer,
+                parameter_hash=np.array(self.network.built_hash),
+                **self.network.edge_arrays(),
+            )
+            edges = buffer.getvalue()
+        header = Project.PAYLOAD_HEADER.pack(
+            Project.PAYLOAD_MAGIC, Project.PAYLOAD_VERSION, len(parameters)
+        )
+        return header + parameters + edges
+
+    # reads to_bytes(), the connections are attached if they match the parameters
+    @classmethod
+    def from_bytes(cls, payload: bytes):
+        header_size = Project.PAYLOAD_HEADER.size
+        if len(payload) < header_size:
+            raise ValueError("Payload is too short")
+        magic, version, length = Project.PAYLOAD_HEADER.unpack_from(payload)
+        if magic != Project.PAYLOAD_MAGIC:
+            raise ValueError("Payload is not a project")
+        if version != Project.PAYLOAD_VERSION:
+            raise ValueError(f"Unsupported payload version {version}")
+        parameters = payload[header_size : header_size + length]
+        project = cls.from_dict(json.loads(zlib.decompress(parameters)))
+        edges = payload[header_size + length :]
+        if project and project.network and edges:
+            with np.load(io.BytesIO(edges)) as data:
+                project._attach_graph(data)
+        return project
 
     @classmethod
     def load_from_file(_, file_location):
@@ -53,7 +135,12 @@ class Project:
             os.path.join(file_location, Project.NETWORK_FILE_NAME), "r", encoding="utf-8"
         ) as f:
             data = json.load(f)
-        return Project.from_dict(data)
+        project = Project.from_dict(data)
+        if project:
+            # the folder might have been moved since the project was saved
+            project.file_location = file_location
+            project.load_graph()
+        return project
 
     def to_dict(self):
         return {
@@ -76,4 +163,4 @@ class Project:
         if "network" in data and data["network"]:
             project.network = Network.from_dict(data["network"])
 
-        return project
\ No newline at end of file
+        return project
@@ -26,6 +26,20 @@ class SimStats:
                 self.group_sizes.append(group.size)
                 self.group_stats[group.id] = GroupSimStats(group.size, group.name, self.disease_ids)
 
+    @classmethod
+    def from_compiled(cls, compiled, diseases=None):
+        if diseases is None:
+            diseases = compiled.diseases
+        instance = cls(None)
+        instance.disease_ids = [disease.id for disease in diseases]
+        instance.disease_names = [disease.name for disease in diseases]
+        instance.group_ids = list(compiled.group_ids)
+        instance.group_names = list(compiled.group_names)
+        instance.group_sizes = [int(size) for size in compiled.group_sizes]
+        for id, name, size in zip(instance.group_ids, instance.group_names, instance.group_sizes):
+            instance.group_stats[id] = GroupSimStats(size, name, instance.disease_ids)
+        return instance
+
     def new_step(self):
         for group in self.group_stats:
             self.group_stats[group].new_step()
@@ -369,32 +383,32 @@ class GroupSimStats:
         self.vacc_deaths.append(0)
         self.unvacc_deaths.append(0)
 
-    def add_death(self):
-        self.deaths[-1] += 1
+    def add_death(self, amount: int = 1):
+        self.deaths[-1] += amount
 
-    def add_vacc_death(self):
-        self.vacc_deaths[-1] += 1
+    def add_vacc_death(self, amount: int = 1):
+        self.vacc_deaths[-1] += amount
 
-    def add_unvacc_death(self):
-        self.unvacc_deaths[-1] += 1
+    def add_unvacc_death(self, amount: int = 1):
+        self.unvacc_deaths[-1] += amount
 
-    def add_vaccination(self):
-        self.vaccinations[-1] += 1
+    def add_vaccination(self, amount: int = 1):
+        self.vaccinations[-1] += amount
 
-    def add_infection(self, disease_id):
-        self.infections[disease_id][-1] += 1
+    def add_infection(self, disease_id, amount: int = 1):
+        self.infections[disease_id][-1] += amount
 
-    def add_vacc_infection(self, disease_id):
-        self.vacc_infections[disease_id][-1] += 1
+    def add_vacc_infection(self, disease_id, amount: int = 1):
+        self.vacc_infections[disease_id][-1] += amount
 
-    def add_unvacc_infection(self, disease_id):
-        self.unvacc_infections[disease_id][-1] += 1
+    def add_unvacc_infection(self, disease_id, amount: int = 1):
+        self.unvacc_infections[disease_id][-1] += amount
 
-    def add_reinfection(self, disease_id):
-        self.reinfections[disease_id][-1] += 1
+    def add_reinfection(self, disease_id, amount: int = 1):
+        self.reinfections[disease_id][-1] += amount
 
-    def add_cure(self, disease_id):
-        self.cures[disease_id][-1] += 1
+    def add_cure(self, disease_id, amount: int = 1):
+        self.cures[disease_id][-1] += amount
 
     def to_dict(self):
         return {
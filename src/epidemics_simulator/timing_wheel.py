@@ -0,0 +1,37 @@
+from typing import List
+
+
+# Event scheduler keyed by simulation step. Events up to len(slots) steps ahead are kept
+# in a ring of slots, events further away wait in an overflow dict until the wheel gets
+# close enough. advance() has to be called once for every step in order.
+class TimingWheel:
+    def __init__(self, size: int = 64) -> None:
+        self.slots: List[list] = [[] for _ in range(size)]
+        self.overflow = {}
+        self.current_step = 0
+
+    def schedule(self, step: int, item) -> None:
+        if step <= self.current_step:
+            raise ValueError("Events can only be scheduled for future steps")
+        if step - self.current_step <= len(self.slots):
+            self.slots[step % len(self.slots)].append(item)
+        else:
+            self.overflow.setdefault(step, []).append(item)
+
+    # moves the wheel to the next step and returns all items scheduled for it
+    def advance(self) -> list:
+        self.current_step += 1
+        slot = self.current_step % len(self.slots)
+        due = self.slots[slot]
+        # the freed slot now covers the step len(slots) ahead
+        self.slots[slot] = self.overflow.pop(self.current_step + len(self.slots), [])
+        return due
+
+    def clear(self) -> None:
+        for slot in self.slots:
+            slot.clear()
+        self.overflow.clear()
+        self.current_step = 0
+
+    def __len__(self) -> int:
+        return sum(len(slot) for slot in self.slots) + sum(len(x) for x in self.overflow.values())
@@ -1,4 +1,4 @@
-from src.epidemics_simulator.storage import Network, Project, SimStats
+from src.epidemics_simulator.storage import Network, NetworkCache, Project, SimStats
 from src.epidemics_simulator.visualization.networks.html_network_view import HTMLNetworkView
 from src.epidemics_simulator.visualization.networks.html_simulation_view import HTMLSimulationView
 from src.epidemics_simulator.visualization.networks.graph_3d import Graph3D
@@ -33,6 +33,8 @@ class DashServer:
 
         stats_view = HTMLStatsView(project)
 
+        cache = NetworkCache()
+
         @callback(
             Output("page-content", "children"),
             # Output("dummy-button", "n_clicks"),
@@ -55,11 +57,15 @@ class DashServer:
         @app.server.route("/update-data", methods=["POST"])
         def update():
             try:
-                json_data = request.get_json()
-                generate = json_data['generate']
-                project = Project.from_dict(json_data['data'])
+                if request.mimetype != Project.PAYLOAD_CONTENT_TYPE:
+                    raise ValueError(f"Expected {Project.PAYLOAD_CONTENT_TYPE}")
+                # the connections are attached if the GUI sent them
+                generate = request.args.get('generate') == '1'
+                project = Project.from_bytes(request.get_data())
                 if generate:
-                    project.network.build()
+                    # only build if the GUI did not send connections that fit
+                    if not project.network.is_built:
+                        cache.build(project.network)
                     graph.update_network(project.network)
                 html_view.reset()
                 sim_view.project = project
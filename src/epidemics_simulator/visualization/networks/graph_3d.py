@@ -29,7 +29,7 @@ class Graph3D:
         self.visible_node_percent = 1
         (
             self.group_coords,
-            self.node_id_map,
+            self.node_coord_index,
             self.Xn,
             self.Yn,
             self.Zn,
@@ -107,7 +107,7 @@ class Graph3D:
         self.visible_node_percent = percent / 100.0
         (
             self.group_coords,
-            self.node_id_map,
+            self.node_coord_index,
             self.Xn,
             self.Yn,
             self.Zn,
@@ -118,7 +118,7 @@ class Graph3D:
     def on_reload(self, show_status_colors):
         (
             self.group_coords,
-            self.node_id_map,
+            self.node_coord_index,
             self.Xn,
             self.Yn,
             self.Zn,
@@ -152,7 +152,7 @@ class Graph3D:
             self.show_internal_edges,
             self.show_external_edges,
             self.hidden_groups,
-            self.node_id_map,
+            self.node_coord_index,
             self.Xn,
             self.Yn,
             self.Zn,
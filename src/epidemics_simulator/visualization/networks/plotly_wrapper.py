@@ -1,6 +1,7 @@
 import math
 import itertools
 import random
+import numpy as np
 from src.epidemics_simulator.storage import Network
 from src.epidemics_simulator.algorithms import CircleGrid
 
@@ -11,33 +12,37 @@ class PlotlyWrapper:
         internal_edges: bool,
         external_edges: bool,
         hidden_groups,
-        node_id_map,
+        node_coord_index,
         node_coords_x,
         node_coords_y,
         node_coords_z,
     ):
-        aXe, aYe, aZe = [], [], []
-        for group in network.active_groups:
-            if group.id in hidden_groups:
-                continue
-            if internal_edges:
-                edges = list(group.internal_edges)
-            else:
-                edges = []
-            if external_edges:
-                for target in group.external_edges:
-                    if target not in hidden_groups:
-                        edges.extend(group.external_edges[target])
-            for edge in edges:
-                _from, to = edge.split("/")
-                if not (_from in node_id_map and to in node_id_map):
-                    continue
-                from_ind = node_id_map[_from]
-                to_ind = node_id_map[to]
-                aXe.extend([node_coords_x[from_ind], node_coords_x[to_ind], None])
-                aYe.extend([node_coords_y[from_ind], node_coords_y[to_ind], None])
-                aZe.extend([node_coords_z[from_ind], node_coords_z[to_ind], None])
-        return aXe, aYe, aZe
+        compiled = network.compile()
+        _from, to, internal = compiled.edge_list()
+        visible = np.zeros(len(_from), dtype=bool)
+        if internal_edges:
+            visible |= internal
+        if external_edges:
+            visible |= ~internal
+        hidden = np.isin(
+            compiled.node_group,
+            [compiled.group_index(id) for id in hidden_groups if id in compiled.group_ids],
+        )
+        visible &= ~hidden[_from] & ~hidden[to]
+        from_ind = node_coord_index[_from[visible]]
+        to_ind = node_coord_index[to[visible]]
+        # nodes without coordinates are not shown at the current visible node percent
+        shown = (from_ind >= 0) & (to_ind >= 0)
+        from_ind = from_ind[shown]
+        to_ind = to_ind[shown]
+        coords = []
+        for node_coords in [node_coords_x, node_coords_y, node_coords_z]:
+            node_coords = np.asarray(node_coords, dtype=object)
+            edge_coords = np.full(3 * len(from_ind), None, dtype=object)
+            edge_coords[0::3] = node_coords[from_ind]
+            edge_coords[1::3] = node_coords[to_ind]
+            coords.append(edge_coords.tolist())
+        return tuple(coords)
 
     def get_cube_coords(network: Network, visible_node_percent):
         max_group_size = 0
@@ -67,8 +72,10 @@ class PlotlyWrapper:
         ]
 
     def calculate_network_coords(network: Network, visible_node_percent):
+        compiled = network.compile()
         group_coords = {}
-        node_id_map = {}
+        # coordinate index of every compiled node, -1 if the node is not shown
+        node_coord_index = np.full(compiled.size, -1, dtype=np.int64)
         Xn = []
         Yn = []
         Zn = []
@@ -77,10 +84,11 @@ class PlotlyWrapper:
             node_coords = CircleGrid.get_points_3D(math.ceil(visible_node_percent * group.size))
             node_coords = PlotlyWrapper.adjust_node_coords(cube_coords, node_coords)
             group_coords[group.id] = node_coords
-            for i, node in zip(range(len(Xn), len(Xn) + len(node_coords)), group.members):
-                node_id_map[node.id] = i
+            start = compiled.group_slice(group.id).start
+            amount = min(len(node_coords), group.size)
+            node_coord_index[start : start + amount] = np.arange(len(Xn), len(Xn) + amount)
             x, y, z = zip(*node_coords)
             Xn.extend(x)
             Yn.extend(y)
             Zn.extend(z)
-        return group_coords, node_id_map, Xn, Yn, Zn
+        return group_coords, node_coord_index, Xn, Yn, Zn
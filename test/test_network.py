@@ -1,8 +1,15 @@
+import gc
+import itertools
+import os
 import random
 import sys
+import tempfile
+import tracemalloc
 import unittest
+import numpy as np
+from src.epidemics_simulator.algorithms import ErdosGallai, HavelHakimi, HavelHakimiDual
 from src.epidemics_simulator.network_builder import NetworkBuilder
-from src.epidemics_simulator.storage import Network, NodeGroup
+from src.epidemics_simulator.storage import Disease, Network, NetworkCache, NodeGroup
 
 
 class TestInternalConnections(unittest.TestCase):
@@ -216,6 +223,511 @@ class TestExternalConnections(unittest.TestCase):
             n.groups[0].add_external_connection("1", 15, 20)
 
 
+class TestHavelHakimi(unittest.TestCase):
+    def test_realizes_sequence(self):
+        h = HavelHakimi(500, 2, 12)
+        edges = h.run()
+        degrees = [0] * 500
+        pairs = set()
+        for node, targets in edges.items():
+            for target in targets:
+                self.assertNotEqual(node, target)
+                pairs.add(frozenset((node, target)))
+                degrees[node] += 1
+                degrees[target] += 1
+        self.assertEqual(len(pairs), sum(degrees) // 2)
+        for node, deg in zip(h.node_id_seq, h.deg_seq):
+            self.assertEqual(degrees[node], deg)
+
+    def test_dual_realizes_sequence(self):
+        h = HavelHakimiDual(200, 300, 1, 9)
+        edges = h.run()
+        degrees = [0] * 300
+        for node, targets in edges.items():
+            self.assertEqual(len(set(targets)), len(targets))
+            for target in targets:
+                degrees[target] += 1
+        for node, deg in zip(h.node_id_seq1, h.deg_seq1):
+            self.assertEqual(len(edges.get(node, [])), deg)
+        for node, deg in zip(h.node_id_seq2, h.deg_seq2):
+            self.assertEqual(degrees[node], deg)
+
+    def test_sequence_with_sum(self):
+        h = HavelHakimiDual(50, 400, 2, 6)
+        seq = h._create_sequence_with_sum(400, 300)
+        self.assertEqual(sum(seq), 300)
+        self.assertTrue(all(0 <= x <= 6 for x in seq))
+        seq = h._create_sequence_with_sum(40, 230)
+        self.assertEqual(sum(seq), 230)
+        self.assertTrue(all(2 <= x <= 6 for x in seq))
+        seq = h._create_sequence_with_sum(400, 1000)
+        self.assertEqual(sum(seq), 1000)
+        self.assertTrue(all(2 <= x <= 6 for x in seq))
+
+
+# sorted degree sequences of all graphs with up to 6 nodes
+def all_graphic(max_nodes=6):
+    sequences = set()
+    for n in range(max_nodes + 1):
+        pairs = list(itertools.combinations(range(n), 2))
+        for mask in range(2 ** len(pairs)):
+            degrees = [0] * n
+            for i, (a, b) in enumerate(pairs):
+                if mask >> i & 1:
+                    degrees[a] += 1
+                    degrees[b] += 1
+            sequences.add(tuple(sorted(degrees)))
+    return sequences
+
+
+# sorted degree sequences of both sides of all bipartite graphs with up to 3 and 4 nodes
+def all_bigraphic(max_nodes1=3, max_nodes2=4):
+    sequences = set()
+    for n1 in range(max_nodes1 + 1):
+        for n2 in range(max_nodes2 + 1):
+            pairs = list(itertools.product(range(n1), range(n2)))
+            for mask in range(2 ** len(pairs)):
+                degrees1, degrees2 = [0] * n1, [0] * n2
+                for i, (a, b) in enumerate(pairs):
+                    if mask >> i & 1:
+                        degrees1[a] += 1
+                        degrees2[b] += 1
+                sequences.add((tuple(sorted(degrees1)), tuple(sorted(degrees2))))
+    return sequences
+
+
+class TestErdosGallai(unittest.TestCase):
+    def test_is_graphic(self):
+        graphic = all_graphic()
+        rng = random.Random(7)
+        sequences = [[], [0], [1], [0, 0, 0], [1, 1], [2, 1, 1], [3, 1, 1], [2, 2, 2, 2, 1]]
+        for n in range(1, 7):
+            # degrees up to n + 1 include ones that can't exist in a simple graph
+            sequences += [[rng.randint(0, n + 1) for _ in range(n)] for _ in range(200)]
+        for seq in sequences:
+            expected = tuple(sorted(seq)) in graphic
+            self.assertEqual(ErdosGallai.is_graphic(seq), expected, seq)
+
+    def test_is_bigraphic(self):
+        bigraphic = all_bigraphic()
+        rng = random.Random(7)
+        sequences = [([], []), ([0], []), ([], [0, 0]), ([1], []), ([2], [1, 1]), ([3], [1, 1])]
+        for n1, n2 in itertools.product(range(1, 4), range(1, 5)):
+            for _ in range(50):
+                seq1 = [rng.randint(0, n2 + 1) for _ in range(n1)]
+                seq2 = [rng.randint(0, n1 + 1) for _ in range(n2)]
+                sequences.append((seq1, seq2))
+        for seq1, seq2 in sequences:
+            expected = (tuple(sorted(seq1)), tuple(sorted(seq2))) in bigraphic
+            self.assertEqual(ErdosGallai.is_bigraphic(seq1, seq2), expected, (seq1, seq2))
+
+    def test_make_graphic(self):
+        graphic = all_graphic()
+        rng = random.Random(7)
+        sequences = [[], [0, 0, 0], [1], [5, 0, 0], [3, 3, 3], [6, 6, 6, 6, 6, 6]]
+        for n in range(1, 7):
+            sequences += [[rng.randint(0, n + 1) for _ in range(n)] for _ in range(100)]
+        for seq in sequences:
+            # lowering the highest degree one at a time like Havel-Hakimi did before
+            expected = sorted(seq, reverse=True)
+            while tuple(sorted(expected)) not in graphic:
+                expected[0] -= 1
+                expected.sort(reverse=True)
+            self.assertEqual(ErdosGallai.make_graphic(seq), expected, seq)
+
+
+class TestConfigurationModel(unittest.TestCase):
+    def test_build(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 300, 10, 0.1, 1, 6, 2, "red"))
+        n.add_group(NodeGroup(n, "Test2", 100, 10, 0.1, 1, 4, 0, "red"))
+        n.groups[0].add_external_connection("1", 3, 1)
+        n.groups[0].generator = NodeGroup.CONFIGURATION_MODEL
+        n.build()
+        internal = 0
+        for node in n.groups[0].members:
+            self.assertLessEqual(node.int_conn_amount, 8)
+            self.assertNotIn(node, node.int_connections)
+            self.assertEqual(len(set(node.int_connections)), node.int_conn_amount)
+            self.assertLessEqual(node.get_ext_conn_amount("1"), 4)
+            internal += node.int_conn_amount
+        # only a few edges are lost to self loops and duplicates
+        self.assertGreater(internal, 300 * 4 * 0.95)
+        self.assertEqual(internal // 2, len(n.groups[0].internal_edges))
+        # the group with Havel-Hakimi still gets exact degrees
+        for node in n.groups[1].members:
+            self.assertEqual(node.int_conn_amount, 4)
+        external = sum(node.get_ext_conn_amount() for node in n.groups[0].members)
+        self.assertEqual(n.compile().edge_count, internal // 2 + 200 + external)
+
+    def test_generator_is_saved(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 10, 10, 0.1, 1, 2, 0, "red"))
+        n.add_group(NodeGroup(n, "Test2", 10, 10, 0.1, 1, 2, 0, "red"))
+        n.groups[0].generator = NodeGroup.CONFIGURATION_MODEL
+        loaded = Network.from_dict(n.to_dict())
+        self.assertEqual(loaded.groups[0].generator, NodeGroup.CONFIGURATION_MODEL)
+        self.assertEqual(loaded.groups[1].generator, NodeGroup.HAVEL_HAKIMI)
+
+
+class TestStochasticBlockModel(unittest.TestCase):
+    def test_build(self):
+        n = Network()
+        n.external_generator = Network.STOCHASTIC_BLOCK_MODEL
+        for size in [100, 200, 300, 400]:
+            n.add_group(NodeGroup(n, "Test", size, 10, 0.1, 1, 4, 0, "red"))
+        for i in range(4):
+            for j in range(i + 1, 4):
+                n.groups[i].add_external_connection(str(j), 3, 1)
+        n.build()
+        for node in n.groups[0].members:
+            for j in range(1, 4):
+                # the smaller group of every pair keeps its drawn degrees, minus duplicates
+                self.assertLessEqual(node.get_ext_conn_amount(str(j)), 4)
+            self.assertEqual(len(set(node.ext_connections)), node.get_ext_conn_amount())
+        edges = sum(node.get_ext_conn_amount() for g in n.groups for node in g.members) // 2
+        # 100 + 100 + 100 + 200 + 200 + 300 nodes on the smaller sides with 3 on average
+        self.assertAlmostEqual(edges, 1000 * 3, delta=150)
+        self.assertEqual(n.compile().edge_count, edges + 1000 * 2)
+        loaded = Network.from_dict(n.to_dict())
+        self.assertEqual(loaded.external_generator, Network.STOCHASTIC_BLOCK_MODEL)
+
+
+class TestParallelBuild(unittest.TestCase):
+    def _edges(self, n):
+        edges = set()
+        for group in n.groups:
+            edges |= group.internal_edges
+            for external in group.external_edges.values():
+                edges |= external
+        return edges
+
+    def test_same_for_any_worker_count(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 200, 10, 0.1, 1, 6, 2, "red"))
+        n.add_group(NodeGroup(n, "Test2", 100, 10, 0.1, 1, 4, 1, "red"))
+        n.add_group(NodeGroup(n, "Test3", 300, 10, 0.1, 1, 5, 2, "red"))
+        n.groups[2].generator = NodeGroup.CONFIGURATION_MODEL
+        n.groups[0].add_external_connection("1", 3, 1)
+        n.build(seed=42)
+        edges = self._edges(n)
+        n.build(workers=2, seed=42)
+        self.assertEqual(self._edges(n), edges)
+        for node in n.groups[1].members:
+            self.assertIn(node.int_conn_amount, range(3, 6))
+        n.build(seed=43)
+        self.assertNotEqual(self._edges(n), edges)
+
+    def test_keeps_global_state(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 200, 10, 0.1, 1, 6, 2, "red"))
+        n.add_group(NodeGroup(n, "Test2", 100, 10, 0.1, 1, 4, 1, "red"))
+        n.groups[1].generator = NodeGroup.CONFIGURATION_MODEL
+        n.groups[0].add_external_connection("1", 3, 1)
+        for external_generator in [Network.PAIRWISE, Network.STOCHASTIC_BLOCK_MODEL]:
+            n.external_generator = external_generator
+            state = random.getstate()
+            np_state = np.random.get_state()
+            n.build(seed=42)
+            edges = self._edges(n)
+            self.assertEqual(random.getstate(), state)
+            self.assertTrue(
+                all(np.array_equal(a, b) for a, b in zip(np.random.get_state(), np_state))
+            )
+            random.seed(1)
+            np.random.seed(1)
+            n.build(seed=42)
+            self.assertEqual(self._edges(n), edges)
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    def _edges(self, group):
+        return set(group.internal_edges), {
+            id: set(edges) for id, edges in group.external_edges.items()
+        }
+
+    def test_only_changed_parts(self):
+        for generator in [Network.PAIRWISE, Network.STOCHASTIC_BLOCK_MODEL]:
+            n = Network()
+            n.external_generator = generator
+            for size in [100, 80, 60]:
+                n.add_group(NodeGroup(n, "Test", size, 10, 0.1, 1, 4, 1, "red"))
+            n.groups[0].add_external_connection("1", 2, 1)
+            n.groups[1].add_external_connection("2", 2, 1)
+            n.build()
+            before = [self._edges(group) for group in n.groups]
+            n.groups[0].avrg_int_con = 6
+            n.build(incremental=True)
+            after = [self._edges(group) for group in n.groups]
+            self.assertNotEqual(after[0][0], before[0][0])
+            self.assertEqual(after[0][1], before[0][1])
+            self.assertEqual(after[1:], before[1:])
+            for node in n.groups[0].members:
+                self.assertIn(node.int_conn_amount, range(5, 8))
+
+            # a resized group gets new connections to all its partners
+            values = n.groups[2].get_properties_dict()
+            values["member count"] = 70
+            n.groups[2].set_from_dict(values)
+            n.build(incremental=True)
+            self.assertEqual(self._edges(n.groups[0]), after[0])
+            for node in n.groups[2].members:
+                self.assertIn(node.int_conn_amount, range(3, 6))
+            self.assertGreater(sum(x.get_ext_conn_amount() for x in n.groups[2].members), 0)
+            n.groups[1].delete_external_connection("2")
+            n.build(incremental=True)
+            self.assertEqual(sum(x.get_ext_conn_amount() for x in n.groups[2].members), 0)
+            self.assertEqual(self._edges(n.groups[0]), after[0])
+
+
+class TestNetworkCache(unittest.TestCase):
+    def _network(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 100, 10, 0.1, 1, 4, 1, "red"))
+        n.add_group(NodeGroup(n, "Test2", 50, 10, 0.1, 1, 4, 1, "red"))
+        n.groups[0].add_external_connection("1", 2, 1)
+        return n
+
+    def test_load_and_evict(self):
+        with tempfile.TemporaryDirectory() as folder:
+            cache = NetworkCache(folder)
+            n = self._network()
+            self.assertFalse(cache.build(n))
+            loaded = self._network()
+            self.assertTrue(cache.build(loaded))
+            self.assertTrue(loaded.is_built)
+            self.assertEqual(set(loaded.groups[0].internal_edges), set(n.groups[0].internal_edges))
+            # the smaller group stores the connections between them
+            self.assertEqual(
+                set(loaded.groups[1].external_edges["0"]), set(n.groups[1].external_edges["0"])
+            )
+            # another configuration and back
+            loaded.groups[1].active = False
+            self.assertFalse(cache.build(loaded))
+            loaded.groups[1].active = True
+            # file times can be equal within a clock tick, age both files before using one
+            for name in os.listdir(folder):
+                os.utime(os.path.join(folder, name), (0, 0))
+            self.assertTrue(cache.build(loaded))
+            self.assertEqual(set(loaded.groups[0].internal_edges), set(n.groups[0].internal_edges))
+            self.assertEqual(len(os.listdir(folder)), 2)
+            # only the most recently used file fits, files still being written stay
+            with open(os.path.join(folder, "writing.tmp"), "wb") as f:
+                f.write(b"0")
+            os.utime(os.path.join(folder, "writing.tmp"), (0, 0))
+            cache.max_bytes = os.path.getsize(cache.path(loaded))
+            cache.evict()
+            self.assertEqual(
+                sorted(os.listdir(folder)), [os.path.basename(cache.path(loaded)), "writing.tmp"]
+            )
+
+    def test_keeps_built_network(self):
+        with tempfile.TemporaryDirectory() as folder:
+            cache = NetworkCache(folder)
+            n = self._network()
+            n.build(seed=1)
+            edges = set(n.groups[0].internal_edges)
+            self.assertTrue(cache.build(n, seed=2))
+            self.assertEqual(set(n.groups[0].internal_edges), edges)
+            self.assertEqual(os.listdir(folder), [])
+
+    def test_hash_ignores_inactive_groups(self):
+        n = self._network()
+        n.add_group(NodeGroup(n, "Test3", 30, 10, 0.1, 1, 4, 1, "red"))
+        n.groups[2].active = False
+        before = n.parameter_hash()
+        n.groups[2].avrg_int_con = 6
+        n.groups[0].add_external_connection("2", 3, 1)
+        self.assertEqual(n.parameter_hash(), before)
+        n.build()
+        n.groups[2].avrg_int_con = 5
+        self.assertTrue(n.is_built)
+        n.groups[2].active = True
+        self.assertFalse(n.is_built)
+
+
+class TestLookup(unittest.TestCase):
+    def test_members(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 10, 10, 0.1, 1, 2, 0, "red"))
+        group = n.groups[0]
+        self.assertEqual(group.get_member("0-7"), group.members[7])
+        self.assertIsNone(group.get_member("0-10"))
+        group.create_members(5)
+        self.assertEqual(group.get_member("0-14"), group.members[14])
+        values = group.get_properties_dict()
+        values["member count"] = 3
+        group.set_from_dict(values)
+        self.assertEqual(group.get_member("0-2"), group.members[2])
+        self.assertIsNone(group.get_member("0-3"))
+
+    def test_groups_and_diseases(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 10, 10, 0.1, 1, 2, 0, "red"))
+        n.add_group(NodeGroup(n, "Test2", 10, 10, 0.1, 1, 2, 0, "red"))
+        n.add_disease(Disease("Test"))
+        disease = n.diseases[0]
+        self.assertIs(n.get_group_by_id("1"), n.groups[1])
+        self.assertIs(n.get_disease_by_id(disease.id), disease)
+        self.assertTrue(n.delete_group("0"))
+        self.assertFalse(n.delete_group("0"))
+        self.assertIsNone(n.get_group_by_id("0"))
+        loaded = Network.from_dict(n.to_dict())
+        self.assertIs(loaded.get_group_by_id("1"), loaded.groups[0])
+        self.assertIs(loaded.get_disease_by_id(disease.id), loaded.diseases[0])
+        self.assertEqual(loaded.groups[0].get_member("1-4"), loaded.groups[0].members[4])
+        self.assertTrue(n.remove_disease(disease.id))
+        self.assertIsNone(n.get_disease_by_id(disease.id))
+
+
+class TestNodeStore(unittest.TestCase):
+    def test_views(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 50, 10, 0.1, 1, 4, 0, "red"))
+        n.add_group(NodeGroup(n, "Test2", 50, 10, 0.1, 1, 4, 0, "red"))
+        n.groups[0].add_external_connection("1", 2, 0)
+        n.build()
+        node = n.groups[0].members[3]
+        self.assertEqual(node, n.groups[0].get_member("0-3"))
+        self.assertEqual(len({node, n.groups[0].members[3]}), 1)
+        node.vaccinated = True
+        node.infected_time += 2
+        self.assertTrue(n.groups[0].store.vaccinated[3])
+        self.assertEqual(n.groups[0].members[3].infected_time, 2)
+        for target in node.int_connections:
+            self.assertIn(node, target.int_connections)
+        for target in node.ext_connections:
+            self.assertIs(target.group, n.groups[1])
+            self.assertIn(node, target.ext_connections)
+        self.assertEqual(node.get_ext_conn_amount(), 2)
+
+    def test_edge_views(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 5, 10, 0.1, 1, 0, 0, "red"))
+        n.add_group(NodeGroup(n, "Test2", 5, 10, 0.1, 1, 0, 0, "red"))
+        n.groups[0].members[1].add_int_connection("0-3")
+        n.groups[0].members[2].add_ext_connection("1-4")
+        self.assertEqual(set(n.groups[0].internal_edges), {"0-1/0-3"})
+        self.assertIn("0-1/0-3", n.groups[0].internal_edges)
+        self.assertNotIn("0-3/0-1", n.groups[0].internal_edges)
+        self.assertEqual(len(n.groups[0].internal_edges), 1)
+        self.assertEqual(list(n.groups[0].external_edges), ["1"])
+        self.assertEqual(n.groups[0].external_edges["1"] | {"x"}, {"0-2/1-4", "x"})
+        self.assertEqual(n.groups[0].store.int_sources.itemsize, 4)
+        n.groups[0].clear_connections()
+        self.assertEqual(len(n.groups[0].internal_edges), 0)
+        self.assertEqual(n.groups[0].external_edges, {})
+
+    def test_inactive_groups(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 100, 10, 0.1, 1, 4, 0, "red"))
+        # the smaller group stores the connections between them
+        n.add_group(NodeGroup(n, "Test2", 50, 10, 0.1, 1, 4, 0, "red"))
+        n.groups[0].add_external_connection("1", 2, 0)
+        n.build()
+        self.assertEqual(n.groups[0].adjacency.groups, [n.groups[1]])
+        n.groups[1].active = False
+        n.build()
+        # the connections of the inactive group are left over but not used
+        self.assertTrue(n.groups[1].store.ext_sources)
+        self.assertEqual(n.groups[0].adjacency.groups, [])
+        self.assertEqual(sum(x.get_ext_conn_amount() for x in n.groups[0].members), 0)
+        self.assertEqual(list(n.edge_arrays()), ["int_0"])
+
+    def test_memory_per_node(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 10000, 10, 0.1, 1, 4, 0, "red"))
+        store = n.groups[0].store
+        # a few typed values per node instead of an object with lists
+        self.assertLessEqual(store.nbytes / store.size, 32)
+        n.groups[0].create_members(10)
+        self.assertEqual(n.groups[0].size, 10010)
+        self.assertEqual(n.groups[0].members[-1].id, "0-10009")
+
+
+class TestMemory(unittest.TestCase):
+    def test_rebuilds_stay_flat(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 500, 10, 0.1, 1, 4, 1, "red"))
+        n.add_group(NodeGroup(n, "Test2", 300, 10, 0.1, 1, 4, 1, "red"))
+        n.groups[0].add_external_connection("1", 2, 1)
+        data = n.to_dict()
+
+        # like the /update-data route and the editor do on every change
+        def rebuild():
+            loaded = Network.from_dict(data)
+            loaded.build()
+            values = loaded.groups[1].get_properties_dict()
+            values["member count"] = 400
+            loaded.groups[1].set_from_dict(values)
+            loaded.build()
+
+        for _ in range(3):
+            rebuild()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            rebuild()
+            gc.collect()
+            before = tracemalloc.get_traced_memory()[0]
+            for _ in range(10):
+                rebuild()
+            gc.collect()
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        # without the registries nothing of the old networks is left
+        self.assertLess(after - before, 50_000)
+
+
+class TestCompiledNetwork(unittest.TestCase):
+    def test_matches_nodes(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 100, 10, 0.1, 1, 5, 2, "red"))
+        n.add_group(NodeGroup(n, "Test2", 50, 10, 0.1, 1, 4, 0, "red"))
+        n.groups[0].add_external_connection("1", 3, 1)
+        n.build()
+        compiled = n.compile()
+        self.assertEqual(compiled.size, 150)
+        self.assertEqual(compiled.indptr.dtype.name, "int32")
+        self.assertEqual(compiled.indices.dtype.name, "int32")
+        for group in n.groups:
+            for node in group.members:
+                i = compiled.node_index(node.id)
+                internal = compiled.edge_internal[compiled.indptr[i] : compiled.indptr[i + 1]]
+                self.assertEqual(compiled.node_group[i], int(group.id))
+                self.assertEqual(internal.sum(), node.int_conn_amount)
+                self.assertEqual((~internal).sum(), node.get_ext_conn_amount())
+        _from, to, _ = compiled.edge_list()
+        self.assertEqual(len(_from), compiled.edge_count)
+        self.assertTrue((_from < to).all())
+
+    def test_cache(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 100, 10, 0.1, 1, 5, 2, "red"))
+        n.build()
+        compiled = n.compile()
+        self.assertIs(n.compile(), compiled)
+        n.build()
+        self.assertIsNot(n.compile(), compiled)
+
+    def test_cache_follows_edits(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 100, 10, 0.1, 1, 0, 0, "red"))
+        n.build()
+        compiled = n.compile()
+        values = n.groups[0].get_properties_dict()
+        values["vaccination rate"] = 0.5
+        n.groups[0].set_from_dict(values)
+        n.add_disease(Disease("Test"))
+        self.assertIs(n.compile(), compiled)
+        self.assertEqual(compiled.vaccination_rate[0], 0.5)
+        self.assertEqual(len(compiled.diseases), 1)
+        # connections added by hand
+        n.groups[0].members[0].add_int_connection("0-1")
+        self.assertEqual(n.compile().edge_count, 1)
+
+
 if __name__ == "__main__":
     unittest.main()
 
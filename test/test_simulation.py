@@ -0,0 +1,412 @@
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+from src.epidemics_simulator.__main__ import main
+from src.epidemics_simulator.array_simulation import ArraySimulation
+from src.epidemics_simulator.ensemble import run_ensemble
+from src.epidemics_simulator.gillespie_simulation import GillespieSimulation
+from src.epidemics_simulator.simulation import Simulation
+from src.epidemics_simulator.storage import Disease, Network, NodeGroup, Project, SharedNetwork
+from src.epidemics_simulator.timing_wheel import TimingWheel
+
+
+def create_network():
+    n = Network()
+    n.add_group(NodeGroup(n, "Test1", 200, 10, 0.05, 0.5, 6, 2, "red"))
+    n.add_group(NodeGroup(n, "Test2", 150, 10, 0.02, 0.3, 4, 1, "blue"))
+    n.groups[0].add_external_connection("1", 2, 1)
+    n.add_disease(
+        Disease(
+            "Disease 1",
+            fatality_rate=0.1,
+            vaccinated_fatality_rate=0.01,
+            infection_rate=0.2,
+            reinfection_rate=0.1,
+            vaccinated_infection_rate=0.05,
+            duration=3,
+            cure_chance=0.5,
+            immunity_period=2,
+            initial_infection_count=10,
+        )
+    )
+    n.build()
+    return n
+
+
+# one infectious center connected to every leaf, the odd leaves are dead
+def create_star(leaves):
+    n = Network()
+    n.add_group(NodeGroup(n, "Star", leaves + 1, 10, 0, 1, 0, 0, "red"))
+    n.add_disease(Disease("Disease 1", infection_rate=0.3, cure_chance=0, duration=100))
+    n.diseases[0].initial_infection_count = 0
+    n.build()
+    n.groups[0].add_internal_edges([0] * leaves, range(1, leaves + 1))
+    return n
+
+
+def run(simulation, steps):
+    simulation.init_simulation()
+    for _ in range(steps):
+        simulation.simulate_step()
+    totals = {}
+    for group_id, stats in simulation.stats.group_stats.items():
+        totals[group_id] = (
+            sum(sum(x) for x in stats.infections.values()),
+            sum(sum(x) for x in stats.cures.values()),
+            sum(stats.deaths),
+            sum(stats.vaccinations),
+        )
+    return totals
+
+
+class TestArraySimulation(unittest.TestCase):
+    def test_same_stats_layout(self):
+        n = create_network()
+        sim = ArraySimulation(n, seed=1)
+        sim.init_simulation()
+        for _ in range(5):
+            sim.simulate_step()
+        for stats in sim.stats.group_stats.values():
+            self.assertEqual(len(stats.deaths), 6)
+            self.assertEqual(len(stats.vaccinations), 6)
+        infections = sum(x[0] for x in sim.stats.group_stats["0"].infections.values())
+        infections += sum(x[0] for x in sim.stats.group_stats["1"].infections.values())
+        self.assertEqual(infections, 10)
+        colors, all = sim.create_color_seq()
+        self.assertEqual(len(colors["0"]), 200)
+        self.assertEqual(len(all), 350)
+
+    # the legacy simulation isn't reproducible (its sets hash nodes by id), so the means
+    # are compared with a bound of five standard errors of their difference
+    def test_same_distribution(self):
+        random.seed(4)
+        n = create_network()
+        runs = 50
+        legacy = [run(Simulation(n), 15) for _ in range(runs)]
+        vectorized = [run(ArraySimulation(n, seed=i), 15) for i in range(runs)]
+        for group_id in legacy[0]:
+            for i, name in enumerate(["infections", "cures", "deaths", "vaccinations"]):
+                a = np.array([r[group_id][i] for r in legacy])
+                b = np.array([r[group_id][i] for r in vectorized])
+                error = np.sqrt((a.var(ddof=1) + b.var(ddof=1)) / runs)
+                delta = 5 * error + 0.05 * a.mean() + 0.5
+                self.assertAlmostEqual(a.mean(), b.mean(), delta=delta, msg=name)
+
+
+class TestSimulation(unittest.TestCase):
+    def test_susceptible_follows_state(self):
+        random.seed(2)
+        n = create_network()
+        sim = Simulation(n)
+        sim.init_simulation()
+        for _ in range(12):
+            sim.simulate_step()
+            for group in n.active_groups:
+                store = group.store
+                healthy = np.equal(store.infected, None)
+                immune = store.immunity_until_step > sim.current_step
+                expected = (store.alive & healthy & ~immune).tolist()
+                self.assertEqual(sim.susceptible[group], expected)
+
+    def test_vaccination_amount(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 1000, 10, 0.1, 1, 0, 0, "red"))
+        n.build()
+        sim = Simulation(n)
+        random.seed(1)
+        amounts = []
+        for _ in range(200):
+            sim.init_simulation()
+            sim.simulate_step()
+            amounts.append(int(n.groups[0].store.vaccinated.sum()))
+        # binomial with 1000 tries and rate 0.1
+        self.assertAlmostEqual(np.mean(amounts), 100, delta=3)
+        self.assertAlmostEqual(np.var(amounts), 90, delta=30)
+        self.assertEqual(sim.stats.group_stats["0"].vaccinations[1], amounts[-1])
+        # the same seed of the random module vaccinates the same members
+        vaccinated = []
+        for _ in range(2):
+            random.seed(5)
+            sim.init_simulation()
+            sim.simulate_step()
+            vaccinated.append(n.groups[0].store.vaccinated.copy())
+        self.assertTrue((vaccinated[0] == vaccinated[1]).all())
+
+    def test_vaccination_limit(self):
+        n = Network()
+        n.add_group(NodeGroup(n, "Test1", 1000, 10, 0.1, 0.05, 0, 0, "red"))
+        n.build()
+        sim = Simulation(n)
+        sim.init_simulation()
+        for _ in range(3):
+            sim.simulate_step()
+        self.assertEqual(n.groups[0].max_vaccination_amount, 50)
+        self.assertEqual(int(n.groups[0].store.vaccinated.sum()), 50)
+        self.assertEqual(sim.stats.group_stats["0"].vaccinations, [0, 50, 0, 0])
+
+
+class TestHubSampling(unittest.TestCase):
+    LEAVES = 400
+
+    def test_skip_sample(self):
+        random.seed(3)
+        sim = Simulation(create_star(1))
+        hits = [list(sim._skip_sample(1000, 0.05)) for _ in range(200)]
+        self.assertAlmostEqual(np.mean([len(x) for x in hits]), 50, delta=2)
+        for x in hits:
+            self.assertEqual(x, sorted(set(x)))
+            self.assertTrue(all(0 <= i < 1000 for i in x))
+        self.assertEqual(list(sim._skip_sample(5, 1)), [0, 1, 2, 3, 4])
+        self.assertEqual(list(sim._skip_sample(5, 0)), [])
+
+    def test_simulation(self):
+        random.seed(3)
+        n = create_star(self.LEAVES)
+        group = n.groups[0]
+        self.assertGreaterEqual(self.LEAVES, Simulation.HUB_DEGREE)
+        sim = Simulation(n)
+        dead = np.arange(1, self.LEAVES + 1) % 2 == 1
+        hits = []
+        for _ in range(100):
+            sim.init_simulation()
+            sim._infect(group.members[0], n.diseases[0])
+            group.store.alive[1:][dead] = False
+            for i in np.flatnonzero(dead):
+                sim.susceptible[group][i + 1] = False
+            sim.simulate_step()
+            infected = np.not_equal(group.store.infected[1:], None)
+            self.assertFalse(infected[dead].any())
+            hits.append(infected[~dead].mean())
+        self.assertAlmostEqual(np.mean(hits), 0.3, delta=0.01)
+
+    def test_array_simulation(self):
+        n = create_star(self.LEAVES)
+        self.assertGreaterEqual(self.LEAVES, ArraySimulation.HUB_DEGREE)
+        sim = ArraySimulation(n, seed=3)
+        sim.init_simulation()
+        sim._infect(np.array([0]), 0)
+        leaves = np.arange(1, self.LEAVES + 1)
+        sim.alive[leaves[::2]] = False  # the odd leaves
+        sim.immune[leaves[1::4]] = True
+        susceptible = sim._susceptible(leaves)
+        hits = []
+        for _ in range(100):
+            sim.disease[leaves] = -1
+            sim._transmit(np.array([0]))
+            infected = sim.disease[leaves] >= 0
+            self.assertFalse(infected[~susceptible].any())
+            hits.append(infected[susceptible].mean())
+        self.assertAlmostEqual(np.mean(hits), 0.3, delta=0.015)
+
+
+class TestGillespieSimulation(unittest.TestCase):
+    def test_same_stats_layout(self):
+        n = create_network()
+        sim = GillespieSimulation(n, seed=2)
+        sim.init_simulation()
+        for _ in range(5):
+            sim.simulate_step()
+        for stats in sim.stats.group_stats.values():
+            self.assertEqual(len(stats.deaths), 6)
+            self.assertEqual(len(stats.cures[n.diseases[0].id]), 6)
+        self.assertGreater(min(step for step, *_ in sim.events), 5)
+        colors, all = sim.create_color_seq()
+        self.assertEqual(len(all), 350)
+
+    def test_same_distribution(self):
+        random.seed(4)
+        n = create_network()
+        runs = 40
+        discrete = [run(ArraySimulation(n, seed=i), 15) for i in range(runs)]
+        continuous = [run(GillespieSimulation(n, seed=i), 15) for i in range(runs)]
+        for group_id in discrete[0]:
+            for i, name in enumerate(["infections", "cures", "deaths", "vaccinations"]):
+                a = sum(r[group_id][i] for r in discrete) / runs
+                b = sum(r[group_id][i] for r in continuous) / runs
+                self.assertAlmostEqual(a, b, delta=max(3, 0.1 * a), msg=name)
+
+    def test_no_contacts_in_resolving_step(self):
+        n = create_star(50)
+        disease = n.diseases[0]
+        disease.duration = 1
+        disease.cure_chance = 1
+        disease.infection_rate = 1
+        disease.initial_infection_count = 5
+        sim = GillespieSimulation(n, seed=1)
+        sim.init_simulation()
+        for _ in range(5):
+            sim.simulate_step()
+        # infections resolve in the step after, before they could spread
+        infections = sim.stats.group_stats["0"].infections[disease.id]
+        self.assertEqual(sum(infections), 5)
+
+    def test_infection_without_end(self):
+        n = create_network()
+        for factor in [0.5, 0]:
+            n.diseases[0].cure_chance = 0
+            n.diseases[0].infectiousness_factor = factor
+            sim = GillespieSimulation(n, seed=1)
+            thread = threading.Thread(target=run, args=(sim, 5), daemon=True)
+            thread.start()
+            thread.join(timeout=30)
+            self.assertFalse(thread.is_alive(), f"no end with factor {factor}")
+
+    def test_ensemble(self):
+        n = create_network()
+        result = run_ensemble(n, 2, 5, seed=1, engine=GillespieSimulation)
+        self.assertEqual(result.series("0", "deaths").shape, (2, 6))
+
+
+class TestEnsemble(unittest.TestCase):
+    def test_independent_of_workers(self):
+        n = create_network()
+        single = run_ensemble(n, 4, 10, workers=1, seed=3)
+        parallel = run_ensemble(n, 4, 10, workers=2, seed=3)
+        self.assertEqual(len(parallel.stats), 4)
+        for group_id in ["0", "1"]:
+            a = single.series(group_id, "infections", n.diseases[0].id)
+            b = parallel.series(group_id, "infections", n.diseases[0].id)
+            self.assertEqual(a.shape, (4, 11))
+            self.assertTrue((a == b).all())
+            self.assertEqual(parallel.quantiles(group_id, "deaths").shape, (3, 11))
+
+    def test_mean_stats(self):
+        n = create_network()
+        result = run_ensemble(n, 3, 5, seed=1)
+        mean = result.mean_stats()
+        deaths = result.series("0", "deaths").mean(axis=0).tolist()
+        self.assertEqual(mean.group_stats["0"].deaths, deaths)
+        self.assertEqual(mean.group_ids, ["0", "1"])
+
+
+class TestCommandLine(unittest.TestCase):
+    def test_saves_stats(self):
+        with tempfile.TemporaryDirectory() as folder:
+            project = Project(folder)
+            project.network = create_network()
+            project.save_to_file()
+            main([folder, "--steps", "5", "--replicates", "2", "--seed", "1", "--name", "run"])
+            self.assertEqual(
+                sorted(project.stat_file_names), ["run_0.pkl", "run_1.pkl", "run_mean.pkl"]
+            )
+            stats = project.load_stats("run_mean.pkl")
+            self.assertEqual(len(stats.group_stats["0"].deaths), 6)
+
+    def test_saves_built_graph(self):
+        with tempfile.TemporaryDirectory() as folder:
+            project = Project(folder)
+            project.network = create_network()
+            project.network.groups[0].avrg_int_con += 1
+            project.save_to_file()
+            self.assertFalse(os.path.exists(project.graph_file_location))
+            args = [folder, "--steps", "2", "--seed", "1", "--name", "run"]
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                main(args)
+            self.assertIn("Built", output.getvalue())
+            self.assertTrue(os.path.exists(project.graph_file_location))
+            built = Project.load_from_file(folder)
+            self.assertTrue(built.network.is_built)
+            # the second run loads the saved connections instead of building them again
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                main(args + ["--name", "run2"])
+            self.assertIn("Using the saved connections", output.getvalue())
+            loaded = Project.load_from_file(folder)
+            for group, other in zip(built.network.groups, loaded.network.groups):
+                self.assertEqual(set(group.internal_edges), set(other.internal_edges))
+
+    def test_saved_graph(self):
+        with tempfile.TemporaryDirectory() as folder:
+            project = Project(folder)
+            project.network = create_network()
+            project.save_to_file()
+            self.assertTrue(os.path.exists(project.graph_file_location))
+            loaded = Project.load_from_file(folder)
+            self.assertTrue(loaded.network.is_built)
+            for group, other in zip(project.network.groups, loaded.network.groups):
+                self.assertEqual(set(group.internal_edges), set(other.internal_edges))
+                self.assertEqual(group.external_edges.keys(), other.external_edges.keys())
+            compiled = loaded.network.compile()
+            self.assertTrue((compiled.indptr == project.network.compile().indptr).all())
+            self.assertFalse(loaded.network.ensure_built())
+            # changed parameters don't match the saved connections anymore
+            project.network.groups[0].avrg_int_con += 1
+            project.save_to_file()
+            self.assertFalse(os.path.exists(project.graph_file_location))
+            project.network.build()
+            project.save_to_file()
+            # network.json edited by hand
+            project.network.groups[0].delta_int_con += 1
+            with open(project.network_file_location, "w", encoding="utf-8") as f:
+                json.dump(project.to_dict(), f)
+            loaded = Project.load_from_file(folder)
+            self.assertFalse(loaded.network.is_built)
+            self.assertTrue(loaded.network.ensure_built())
+
+    def test_payload(self):
+        project = Project(None)
+        project.network = create_network()
+        loaded = Project.from_bytes(project.to_bytes(include_edges=True))
+        self.assertEqual(loaded.to_dict(), project.to_dict())
+        self.assertTrue(loaded.network.is_built)
+        compiled = loaded.network.compile()
+        self.assertTrue((compiled.indices == project.network.compile().indices).all())
+        # without connections the parameters still arrive
+        loaded = Project.from_bytes(project.to_bytes())
+        self.assertEqual(loaded.to_dict(), project.to_dict())
+        self.assertFalse(loaded.network.is_built)
+        with self.assertRaises(ValueError):
+            Project.from_bytes(b"{}")
+        payload = bytearray(project.to_bytes())
+        payload[5] += 1  # version
+        with self.assertRaises(ValueError):
+            Project.from_bytes(bytes(payload))
+
+
+class TestSharedNetwork(unittest.TestCase):
+    def test_attach(self):
+        n = create_network()
+        compiled = n.compile()
+        with SharedNetwork(compiled) as shared:
+            attached = shared.handle.attach()
+            for name in SharedNetwork.ARRAYS:
+                self.assertTrue((getattr(attached, name) == getattr(compiled, name)).all())
+            self.assertFalse(attached.indices.flags.writeable)
+            self.assertEqual(attached.group_ids, compiled.group_ids)
+            sim = ArraySimulation(attached, seed=1)
+            sim.init_simulation()
+            sim.simulate_step()
+            del sim
+            for segment in attached.shared_segments:
+                segment.close()
+
+
+class TestTimingWheel(unittest.TestCase):
+    def test_overflow(self):
+        wheel = TimingWheel(4)
+        wheel.schedule(2, "a")
+        wheel.schedule(9, "b")
+        wheel.schedule(4, "c")
+        self.assertEqual(len(wheel), 3)
+        due = {}
+        for step in range(1, 11):
+            due[step] = wheel.advance()
+        self.assertEqual(due[2], ["a"])
+        self.assertEqual(due[4], ["c"])
+        self.assertEqual(due[9], ["b"])
+        self.assertEqual(sum(len(x) for x in due.values()), 3)
+        with self.assertRaises(ValueError):
+            wheel.schedule(10, "d")
+
+
+if __name__ == "__main__":
+    unittest.main()